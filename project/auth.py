@@ -0,0 +1,98 @@
+import prisma
+import prisma.enums
+import prisma.models
+import project.cache
+import project.config
+import project.tokens
+from pydantic import BaseModel
+
+
+class SessionInfo(BaseModel):
+    """
+    The caller behind a valid session token.
+    """
+
+    session_id: int
+    user_id: int
+    role: prisma.enums.Role
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == prisma.enums.Role.ADMIN
+
+
+# Valid sessions keyed by session id, so every spelling of a token ("5", "05", a signed token) shares one entry. Logout, user deletion and role changes invalidate entries immediately in this
+# process; the TTL bounds how long another worker process may keep accepting a revoked token.
+session_cache = project.cache.TTLCache(
+    ttl=project.config.SESSION_CACHE_TTL,
+    max_entries=project.config.SESSION_CACHE_MAX_ENTRIES,
+)
+
+
+def remember_session(session: SessionInfo) -> None:
+    """
+    Caches a freshly issued session, so its first use does not need a database lookup.
+    """
+    session_cache.set(session.session_id, session)
+
+
+def forget_session(session_id: int) -> None:
+    """
+    Drops a session from the cache, e.g. after logout.
+    """
+    session_cache.pop(session_id)
+
+
+def forget_user(user_id: int) -> int:
+    """
+    Drops every cached session of a user, e.g. after their role changed or they were deleted.
+
+    Returns:
+        int: The number of cached sessions dropped.
+    """
+    return session_cache.pop_where(lambda session: session.user_id == user_id)
+
+
+async def resolve_session(token: str) -> SessionInfo:
+    """
+    Resolves a session token issued by `login` to the session's user and role.
+
+    With SESSION_TOKEN_FORMAT "id" only plain session ids are accepted. With "signed" only signed tokens are, and they
+    are verified from their signature and embedded claims alone, unless their session may have been revoked. Other valid sessions are served from `session_cache` when possible; only misses query the database.
+
+    Args:
+        token (str): The session token sent by the caller.
+
+    Returns:
+        SessionInfo: The session and its user.
+
+    Raises:
+        ValueError: If the token does not belong to a valid session.
+    """
+    if project.tokens.accepts_unsigned():
+        try:
+            session_id = int(token)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid or expired session token")
+    elif project.tokens.is_signed(token):
+        claims = project.tokens.verify(token)
+        session_id = claims["sid"]
+        if session_id not in project.tokens.revoked_sessions:
+            return SessionInfo(
+                session_id=session_id, user_id=claims["uid"], role=claims["role"]
+            )
+    else:
+        raise ValueError("Invalid or expired session token")
+    cached = session_cache.get(session_id)
+    if cached is not None:
+        return cached
+    session = await prisma.models.Session.prisma().find_first(
+        where={"id": session_id, "valid": True}, include={"user": True}
+    )
+    if session is None or session.user is None:
+        raise ValueError("Invalid or expired session token")
+    info = SessionInfo(
+        session_id=session.id, user_id=session.userId, role=session.user.role
+    )
+    session_cache.set(session_id, info)
+    return info
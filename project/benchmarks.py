@@ -0,0 +1,537 @@
+"""
+Seeded latency benchmarks for the database access paths and the Home Assistant proxy.
+
+Run one with `python -m project.benchmarks <name>`. The database benchmarks run against a scratch database: every one
+seeds its own user, rooms and entities through DATABASE_URL, and removes them again when it finishes. Some drop indexes
+inside a transaction that is rolled back, which locks the tables while they run. The local benchmarks need no database
+and serve Home Assistant from an in-process mock upstream.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import bcrypt
+import httpx
+import prisma
+import prisma.models
+import project.config
+import project.createRoom_service
+import project.homeassistant_client
+import project.listEntities_service
+import project.listEntitiesByRoom_service
+import project.listRooms_service
+import project.pagination
+import project.passwords
+import project.updateRoom_service
+from prisma import Prisma
+
+
+class _Rollback(Exception):
+    pass
+
+
+async def seed_user(client: Prisma) -> int:
+    """
+    Creates a throwaway user owning the seeded rooms and returns its id.
+    """
+    row = await client.query_first(
+        'INSERT INTO "User" ("email", "password") VALUES ($1, $2) RETURNING "id"',
+        f"bench-{uuid.uuid4().hex}@example.invalid",
+        "!",
+    )
+    return row["id"]
+
+
+async def seed_rooms(
+    client: Prisma, user_id: int, rooms: int, entities_per_room: int
+) -> List[int]:
+    """
+    Inserts `rooms` rooms for `user_id` with `entities_per_room` entities each, set-based, and returns the room ids.
+    """
+    created = await client.query_raw(
+        'INSERT INTO "Room" ("name", "userId") '
+        "SELECT 'bench room ' || g, $1 FROM generate_series(1, $2) g "
+        'RETURNING "id"',
+        user_id,
+        rooms,
+    )
+    room_ids = [row["id"] for row in created]
+    if entities_per_room:
+        await client.execute_raw(
+            'INSERT INTO "Entity" ("name", "entityType", "roomId") '
+            "SELECT 'bench entity ' || g, 'sensor', r.\"id\" "
+            'FROM "Room" r, generate_series(1, $2) g WHERE r."userId" = $1',
+            user_id,
+            entities_per_room,
+        )
+    await client.execute_raw('ANALYZE "Room"')
+    await client.execute_raw('ANALYZE "Entity"')
+    return room_ids
+
+
+async def seed_entities(client: Prisma, room_id: int, count: int) -> None:
+    """
+    Adds `count` entities to `room_id`.
+    """
+    await client.execute_raw(
+        'INSERT INTO "Entity" ("name", "entityType", "roomId") '
+        "SELECT 'bench entity ' || gen_random_uuid(), 'sensor', $1 "
+        "FROM generate_series(1, $2)",
+        room_id,
+        count,
+    )
+    await client.execute_raw('ANALYZE "Entity"')
+
+
+async def cleanup(client: Prisma, user_id: int) -> None:
+    """
+    Removes the seeded user with its rooms and their entities.
+    """
+    await client.execute_raw(
+        'DELETE FROM "Entity" WHERE "roomId" IN (SELECT "id" FROM "Room" WHERE "userId" = $1)',
+        user_id,
+    )
+    await client.execute_raw('DELETE FROM "Room" WHERE "userId" = $1', user_id)
+    await client.execute_raw('DELETE FROM "User" WHERE "id" = $1', user_id)
+
+
+async def timed(
+    fn: Callable[[], Awaitable[object]], repeat: int = 20
+) -> Dict[str, float]:
+    """
+    Runs `fn` once to warm up and then `repeat` times, and returns the median and p95 latency in milliseconds.
+    """
+    await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, round(len(samples) * 0.95))],
+    }
+
+
+def report(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    print(title)
+    for label, result in rows.items():
+        print(
+            f"  {label:<40} median {result['median_ms']:9.2f} ms   p95 {result['p95_ms']:9.2f} ms"
+        )
+
+
+async def bench_indexes(client: Prisma, user_id: int) -> None:
+    """
+    Times the lookups served by the Room and Entity indexes at 1k rooms/100k entities, with the indexes in place and
+    with them dropped inside a rolled back transaction.
+    """
+    room_ids = await seed_rooms(client, user_id, rooms=1000, entities_per_room=100)
+    room_id = room_ids[len(room_ids) // 2]
+
+    def queries(db: Prisma) -> Dict[str, Callable[[], Awaitable[object]]]:
+        return {
+            "entities of one room": lambda: prisma.models.Entity.prisma(db).find_many(
+                where={"roomId": room_id}
+            ),
+            "entity by room and name": lambda: prisma.models.Entity.prisma(
+                db
+            ).find_first(where={"roomId": room_id, "name": "bench entity 50"}),
+            "rooms of one user": lambda: prisma.models.Room.prisma(db).find_many(
+                where={"userId": user_id}, take=100, order={"id": "asc"}
+            ),
+        }
+
+    report(
+        "With indexes",
+        {label: await timed(fn) for label, fn in queries(client).items()},
+    )
+    try:
+        async with client.tx(timeout=timedelta(minutes=5)) as tx:
+            for index in (
+                "Entity_roomId_name_key",
+                "Entity_roomId_id_idx",
+                "Room_userId_id_idx",
+            ):
+                await tx.execute_raw(f'DROP INDEX IF EXISTS "{index}"')
+            report(
+                "Without indexes",
+                {label: await timed(fn) for label, fn in queries(tx).items()},
+            )
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+
+async def bench_pagination(client: Prisma, user_id: int) -> None:
+    """
+    Times the first and the last page of one room's entity listing as the room grows from 10k to 100k entities, with
+    keyset pagination (`listEntitiesByRoom`) and with the offset pagination it replaced.
+    """
+    (room_id,) = await seed_rooms(client, user_id, rooms=1, entities_per_room=0)
+    size = 0
+    for target in (10_000, 50_000, 100_000):
+        await seed_entities(client, room_id, target - size)
+        size = target
+        last = await client.query_first(
+            'SELECT "id" FROM "Entity" WHERE "roomId" = $1 ORDER BY "id" OFFSET $2 LIMIT 1',
+            room_id,
+            size - 101,
+        )
+        last_cursor = project.pagination.encode_cursor(last["id"])
+        report(
+            f"{size} entities, page size 100",
+            {
+                "keyset, first page": await timed(
+                    lambda: project.listEntitiesByRoom_service.listEntitiesByRoom(
+                        room_id, 100
+                    )
+                ),
+                "keyset, last page": await timed(
+                    lambda: project.listEntitiesByRoom_service.listEntitiesByRoom(
+                        room_id, 100, last_cursor
+                    )
+                ),
+                "offset, last page": await timed(
+                    lambda: prisma.models.Entity.prisma().find_many(
+                        where={"roomId": room_id},
+                        skip=size - 100,
+                        take=100,
+                        order={"id": "asc"},
+                    )
+                ),
+            },
+        )
+
+
+async def bench_room_listing(client: Prisma, user_id: int) -> None:
+    """
+    Times one 1000-room page of GET /rooms at 1k rooms/100k entities in both ROOM_LISTING_MODE settings, including
+    serialization to the response body.
+    """
+    await seed_rooms(client, user_id, rooms=1000, entities_per_room=100)
+
+    async def orm() -> str:
+        response = await project.listRooms_service.listRooms(
+            project.listRooms_service.GetRoomsRequest(), 1000, userId=user_id
+        )
+        return response.model_dump_json()
+
+    report(
+        "1000 rooms, 100 entities each",
+        {
+            "orm (find_many + models)": await timed(orm, repeat=10),
+            "sql (json_agg)": await timed(
+                lambda: project.listRooms_service.listRoomsJson(1000, userId=user_id),
+                repeat=10,
+            ),
+        },
+    )
+
+
+async def _update_room_sequentially(
+    room_id: int, name: Optional[str], entities: List[int]
+) -> None:
+    # The round trips of updateRoom before it was made transactional: read, delete, attach, rename, read back.
+    room = await prisma.models.Room.prisma().find_unique(
+        where={"id": room_id}, include={"entities": True}
+    )
+    current = {entity.id for entity in room.entities}
+    await prisma.models.Entity.prisma().delete_many(
+        where={"id": {"in": list(current - set(entities))}, "roomId": room_id}
+    )
+    await prisma.models.Entity.prisma().update_many(
+        where={"id": {"in": list(set(entities) - current)}}, data={"roomId": room_id}
+    )
+    if name is not None:
+        await prisma.models.Room.prisma().update(
+            where={"id": room_id}, data={"name": name}
+        )
+    await prisma.models.Room.prisma().find_unique(
+        where={"id": room_id}, include={"entities": True}
+    )
+
+
+async def bench_update_room(client: Prisma, user_id: int) -> None:
+    """
+    Times updateRoom against its former sequential round trips, then runs parallel updates of one room and checks that
+    the room always ends up with exactly one request's entity list.
+    """
+    room_id, pool_id = await seed_rooms(client, user_id, rooms=2, entities_per_room=0)
+    await seed_entities(client, room_id, 50)
+    entity_ids = [
+        entity.id
+        for entity in await prisma.models.Entity.prisma().find_many(
+            where={"roomId": room_id}
+        )
+    ]
+    report(
+        "Updating a room with 50 entities",
+        {
+            "sequential round trips": await timed(
+                lambda: _update_room_sequentially(room_id, None, entity_ids)
+            ),
+            "updateRoom": await timed(
+                lambda: project.updateRoom_service.updateRoom(room_id, None, entity_ids)
+            ),
+        },
+    )
+    for update in ("sequential round trips", "updateRoom"):
+        inconsistent = 0
+        for _ in range(20):
+            await seed_entities(client, pool_id, 200)
+            pool = [
+                entity.id
+                for entity in await prisma.models.Entity.prisma().find_many(
+                    where={"roomId": pool_id}, order={"id": "asc"}
+                )
+            ]
+            requests = [pool[i : i + 20] for i in range(0, 200, 20)]
+            calls = [
+                (
+                    _update_room_sequentially(room_id, None, wanted)
+                    if update == "sequential round trips"
+                    else project.updateRoom_service.updateRoom(room_id, None, wanted)
+                )
+                for wanted in requests
+            ]
+            await asyncio.gather(*calls, return_exceptions=True)
+            final = {
+                entity.id
+                for entity in await prisma.models.Entity.prisma().find_many(
+                    where={"roomId": room_id}
+                )
+            }
+            if not any(final == set(wanted) for wanted in requests):
+                inconsistent += 1
+            await client.execute_raw(
+                'DELETE FROM "Entity" WHERE "roomId" = $1', pool_id
+            )
+        print(
+            f"{update}: {inconsistent}/20 runs of 10 parallel updates left a mix of requests"
+        )
+
+
+async def _create_room_per_entity(user_id: int, entities: List[int]) -> None:
+    # createRoom before it was made set-based: one insert, then one update per entity.
+    room = await prisma.models.Room.prisma().create(
+        data={"name": "bench created room", "userId": user_id}
+    )
+    for entity_id in entities:
+        await prisma.models.Entity.prisma().update(
+            where={"id": entity_id}, data={"roomId": room.id}
+        )
+
+
+async def bench_create_room(client: Prisma, user_id: int) -> None:
+    """
+    Times creating a room that takes over 1, 10, 100 and 1000 existing entities, with one update per entity and with
+    createRoom's single set-based update.
+    """
+    (pool_id,) = await seed_rooms(client, user_id, rooms=1, entities_per_room=0)
+    await seed_entities(client, pool_id, 1000)
+    pool = [
+        entity.id
+        for entity in await prisma.models.Entity.prisma().find_many(
+            where={"roomId": pool_id}, order={"id": "asc"}
+        )
+    ]
+    for size in (1, 10, 100, 1000):
+        wanted = pool[:size]
+        report(
+            f"Room with {size} entities",
+            {
+                "one update per entity": await timed(
+                    lambda: _create_room_per_entity(user_id, wanted), repeat=5
+                ),
+                "createRoom": await timed(
+                    lambda: project.createRoom_service.createRoom(
+                        "bench created room",
+                        wanted,
+                        project.createRoom_service.Role.ADMIN,
+                        user_id,
+                    ),
+                    repeat=5,
+                ),
+            },
+        )
+
+
+def mock_upstream(
+    body: bytes, chunk_size: int = 64 * 1024
+) -> project.homeassistant_client.HomeAssistantClient:
+    """
+    Returns a connected Home Assistant client whose single instance answers every request with `body`, sent in
+    `chunk_size` pieces the way a real response arrives off the socket.
+    """
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for start in range(0, len(body), chunk_size):
+            yield body[start : start + chunk_size]
+
+    url = "http://homeassistant.bench.invalid"
+    client = project.homeassistant_client.HomeAssistantClient(
+        base_url=url,
+        instances=[
+            project.homeassistant_client.HomeAssistantInstance(
+                name="bench", url=url, timeout=60
+            )
+        ],
+    )
+    # Swapped in for the pool `connect` would open, so no socket is involved.
+    client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=chunks())
+        )
+    )
+    return client
+
+
+async def bench_stream() -> None:
+    """
+    Compares GET /entities (`listEntities`, which reads the whole upstream body with `response.json()` before the
+    response is serialized) with GET /entities/stream (`streamEntitiesJson`) on a 20k-entity upstream body: time to the
+    first response byte, time to the last, and the peak Python heap allocated while serving one request.
+    """
+    body = json.dumps(
+        [
+            {"name": f"light.bench_{i}", "type": "light", "status": "on"}
+            for i in range(20_000)
+        ]
+    ).encode()
+    client = mock_upstream(body)
+
+    async def buffered() -> AsyncIterator[bytes]:
+        # A fresh token per request, so the entity cache never answers.
+        response = await project.listEntities_service.listEntities(
+            uuid.uuid4().hex, client
+        )
+        yield response.model_dump_json().encode()
+
+    def streamed() -> AsyncIterator[bytes]:
+        return project.listEntities_service.streamEntitiesJson(uuid.uuid4().hex, client)
+
+    print(f"20000 entities, {len(body) / 1024 / 1024:.1f} MiB upstream body")
+    try:
+        for label, serve in (
+            ("listEntities (response.json())", buffered),
+            ("streamEntitiesJson", streamed),
+        ):
+            first_byte, last_byte = [], []
+            for _ in range(5):
+                started = time.perf_counter()
+                first = None
+                async for _chunk in serve():
+                    if first is None:
+                        first = time.perf_counter() - started
+                first_byte.append(first * 1000)
+                last_byte.append((time.perf_counter() - started) * 1000)
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            async for _chunk in serve():
+                pass
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            tracemalloc.stop()
+            print(
+                f"  {label:<40} ttfb {statistics.median(first_byte):9.2f} ms   "
+                f"total {statistics.median(last_byte):9.2f} ms   peak heap {peak / 1024 / 1024:7.1f} MiB"
+            )
+    finally:
+        await client.disconnect()
+
+
+async def _loop_lag(stop: asyncio.Event, interval: float = 0.005) -> List[float]:
+    # A cheap coroutine standing in for other endpoints: how late each of its short sleeps wakes up, in milliseconds.
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+    return lags
+
+
+async def bench_password_burst(logins: int = 32) -> None:
+    """
+    Fires `logins` concurrent password hashes and then verifications, as a burst of signups and logins would, and
+    measures how late a cheap coroutine on the same event loop wakes up meanwhile. Runs them on the password worker pool
+    (`hash_password`, `verify_password`) and inline with `bcrypt.hashpw`/`bcrypt.checkpw`, which blocks the loop.
+    """
+    rounds = await project.passwords.configure()
+    hashed = await project.passwords.hash_password("bench password")
+
+    async def inline_hash() -> bytes:
+        return bcrypt.hashpw(b"bench password", bcrypt.gensalt(rounds))
+
+    async def inline_verify() -> bool:
+        return bcrypt.checkpw(b"bench password", hashed.encode())
+
+    bursts = {
+        "hash, worker pool": lambda: project.passwords.hash_password("bench password"),
+        "hash, inline bcrypt.hashpw": inline_hash,
+        "verify, worker pool": lambda: project.passwords.verify_password(
+            "bench password", hashed
+        ),
+        "verify, inline bcrypt.checkpw": inline_verify,
+    }
+    print(
+        f"{logins} concurrent operations at cost {rounds}, "
+        f"{project.config.PASSWORD_HASH_WORKERS} password workers; event loop lag in ms"
+    )
+    try:
+        for label, operation in bursts.items():
+            stop = asyncio.Event()
+            ticker = asyncio.create_task(_loop_lag(stop))
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            await asyncio.gather(*(operation() for _ in range(logins)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            lags = sorted(await ticker)
+            print(
+                f"  {label:<32} burst {elapsed:7.2f} s   lag median {statistics.median(lags):8.2f}   "
+                f"p95 {lags[min(len(lags) - 1, round(len(lags) * 0.95))]:8.2f}   max {lags[-1]:8.2f}"
+            )
+    finally:
+        project.passwords.shutdown()
+
+
+BENCHMARKS: Dict[str, Callable[[Prisma, int], Awaitable[None]]] = {
+    "create-room": bench_create_room,
+    "indexes": bench_indexes,
+    "pagination": bench_pagination,
+    "room-listing": bench_room_listing,
+    "update-room": bench_update_room,
+}
+
+LOCAL_BENCHMARKS: Dict[str, Callable[[], Awaitable[None]]] = {
+    "password-burst": bench_password_burst,
+    "stream": bench_stream,
+}
+
+
+async def main(name: str) -> None:
+    if name in LOCAL_BENCHMARKS:
+        await LOCAL_BENCHMARKS[name]()
+        return
+    client = Prisma(auto_register=True)
+    await client.connect()
+    user_id = await seed_user(client)
+    try:
+        await BENCHMARKS[name](client, user_id)
+    finally:
+        await cleanup(client, user_id)
+        await client.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("name", choices=sorted([*BENCHMARKS, *LOCAL_BENCHMARKS]))
+    asyncio.run(main(parser.parse_args().name))
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def token_key(token: str) -> str:
+    """
+    Derives a cache key from a bearer token so that raw credentials are never kept in memory as dictionary keys.
+
+    Args:
+        token (str): The bearer token scoping the cached data.
+
+    Returns:
+        str: A hex digest identifying the token.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value: Any, stored_at: float) -> None:
+        self.value = value
+        self.stored_at = stored_at
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with least-recently-used eviction and a per-entry time to live.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _age(self, entry: _Entry) -> float:
+        return time.monotonic() - entry.stored_at
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value for `key` if it is younger than the TTL, otherwise None.
+        """
+        entry = self._entries.get(key)
+        if entry is None or self._age(entry) >= self.ttl:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the last value stored for `key` regardless of its age, without touching the counters or LRU order.
+        """
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = _Entry(value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.pop(key, None)
+        return entry.value if entry is not None else None
+
+    def pop_where(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        Removes every entry whose value satisfies `predicate`, regardless of its age, and returns how many were removed.
+        """
+        keys = [key for key, entry in self._entries.items() if predicate(entry.value)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class StaleWhileRevalidateCache(TTLCache):
+    """
+    TTL cache for upstream data that keeps serving an expired value for a grace period while a single background task
+    refreshes it, so callers only ever wait on the upstream when nothing usable is cached.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int = 1024) -> None:
+        super().__init__(ttl, max_entries)
+        self.stale_ttl = stale_ttl
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.fallbacks = 0
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+
+    async def get_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Returns the cached value for `key`, loading it with `loader` when missing or too old to serve.
+
+        Args:
+            key (Hashable): The cache key.
+            loader (Callable[[], Awaitable[Any]]): Coroutine factory fetching a fresh value from the upstream.
+
+        Returns:
+            Any: A fresh value, or a stale one while a background refresh is in progress.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._age(entry)
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._schedule_refresh(key, loader)
+                return entry.value
+        self.misses += 1
+        # Shielded so that a caller giving up on its latency budget does not discard a result still on its way.
+        return await asyncio.shield(self._load(key, loader))
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        self.set(key, value)
+        return value
+
+    def fallback(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the last known value for `key`, however old, for use when the upstream cannot be reached in time.
+        """
+        value = self.peek(key)
+        if value is not None:
+            self.fallbacks += 1
+        return value
+
+    def _schedule_refresh(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing[key] = asyncio.create_task(self._refresh(key, loader))
+
+    async def _refresh(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> None:
+        try:
+            await self._load(key, loader)
+            self.refreshes += 1
+        except Exception:
+            self.refresh_errors += 1
+            logger.exception("Background cache refresh failed")
+        finally:
+            self._refreshing.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        lookups = self.hits + self.stale_hits + self.misses
+        stats.update(
+            {
+                "hit_ratio": (
+                    (self.hits + self.stale_hits) / lookups if lookups else 0.0
+                ),
+                "stale_hits": self.stale_hits,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "fallbacks": self.fallbacks,
+                "refreshing": len(self._refreshing),
+            }
+        )
+        return stats
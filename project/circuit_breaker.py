@@ -0,0 +1,121 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+import project.config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream whose circuit is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over a rolling window of recent upstream calls.
+
+    The circuit opens when, over at least `min_calls` calls, the share of failed calls or the share of calls slower than
+    `slow_call_threshold` reaches its configured rate. While open, calls fail fast with CircuitOpenError. After
+    `open_duration` seconds up to `half_open_max_calls` probe calls are let through; the circuit closes again if they
+    all succeed in time and reopens on the first bad probe.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = project.config.CIRCUIT_BREAKER_WINDOW_SIZE,
+        min_calls: int = project.config.CIRCUIT_BREAKER_MIN_CALLS,
+        failure_rate_threshold: float = project.config.CIRCUIT_BREAKER_FAILURE_RATE,
+        slow_call_threshold: float = project.config.CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD,
+        slow_call_rate_threshold: float = project.config.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+        open_duration: float = project.config.CIRCUIT_BREAKER_OPEN_DURATION,
+        half_open_max_calls: int = project.config.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def before_call(self) -> None:
+        """
+        Admits or rejects a call according to the current state.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half open with all probe slots taken.
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_duration:
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit for {self.name} is open")
+            self.state = HALF_OPEN
+            self._probes_started = 0
+            self._probes_succeeded = 0
+        if self.state == HALF_OPEN:
+            if self._probes_started >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit for {self.name} is half open")
+            self._probes_started += 1
+
+    def record(self, failed: bool, duration: float) -> None:
+        """
+        Records the outcome of an admitted call and updates the state.
+
+        Args:
+            failed (bool): Whether the call failed.
+            duration (float): How long the call took, in seconds.
+        """
+        slow = duration >= self.slow_call_threshold
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._open()
+                return
+            self._probes_succeeded += 1
+            if self._probes_succeeded >= self.half_open_max_calls:
+                self.state = CLOSED
+                self._window.clear()
+            return
+        if self.state == OPEN:
+            return
+        self._window.append((failed, slow))
+        calls = len(self._window)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for f, _ in self._window if f)
+        slow_calls = sum(1 for _, s in self._window if s)
+        if (
+            failures / calls >= self.failure_rate_threshold
+            or slow_calls / calls >= self.slow_call_rate_threshold
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+        self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        calls = len(self._window)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failures": sum(1 for f, _ in self._window if f),
+            "window_slow_calls": sum(1 for _, s in self._window if s),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,128 @@
+import os
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """
+    Reads a boolean flag from the environment, accepting the usual truthy spellings.
+
+    Args:
+        name (str): The name of the environment variable.
+        default (bool): The value used when the variable is unset.
+
+    Returns:
+        bool: The parsed flag.
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+HOMEASSISTANT_URL = os.getenv(
+    "HOMEASSISTANT_URL", "https://your-homeassistant-api-domain.com"
+)
+HOMEASSISTANT_TOKEN = os.getenv("HOMEASSISTANT_TOKEN", "your-long-lived-access-token")
+
+HOMEASSISTANT_MAX_CONNECTIONS = int(os.getenv("HOMEASSISTANT_MAX_CONNECTIONS", "100"))
+HOMEASSISTANT_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("HOMEASSISTANT_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+HOMEASSISTANT_KEEPALIVE_EXPIRY = float(
+    os.getenv("HOMEASSISTANT_KEEPALIVE_EXPIRY", "30.0")
+)
+HOMEASSISTANT_HTTP2 = _env_bool("HOMEASSISTANT_HTTP2", False)
+HOMEASSISTANT_CONNECT_TIMEOUT = float(os.getenv("HOMEASSISTANT_CONNECT_TIMEOUT", "5.0"))
+HOMEASSISTANT_READ_TIMEOUT = float(os.getenv("HOMEASSISTANT_READ_TIMEOUT", "10.0"))
+HOMEASSISTANT_POOL_TIMEOUT = float(os.getenv("HOMEASSISTANT_POOL_TIMEOUT", "5.0"))
+
+HOMEASSISTANT_LATENCY_BUDGET = float(os.getenv("HOMEASSISTANT_LATENCY_BUDGET", "3.0"))
+
+CIRCUIT_BREAKER_WINDOW_SIZE = int(os.getenv("CIRCUIT_BREAKER_WINDOW_SIZE", "20"))
+CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "5"))
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD = float(
+    os.getenv("CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD", "2.0")
+)
+CIRCUIT_BREAKER_SLOW_CALL_RATE = float(
+    os.getenv("CIRCUIT_BREAKER_SLOW_CALL_RATE", "0.8")
+)
+CIRCUIT_BREAKER_OPEN_DURATION = float(
+    os.getenv("CIRCUIT_BREAKER_OPEN_DURATION", "30.0")
+)
+CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS = int(
+    os.getenv("CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS", "2")
+)
+
+HOMEASSISTANT_INSTANCES = os.getenv("HOMEASSISTANT_INSTANCES", "")
+HOMEASSISTANT_INSTANCE_TIMEOUT = float(
+    os.getenv("HOMEASSISTANT_INSTANCE_TIMEOUT", "5.0")
+)
+
+HOMEASSISTANT_STATE_CONCURRENCY = int(
+    os.getenv("HOMEASSISTANT_STATE_CONCURRENCY", "10")
+)
+HOMEASSISTANT_STATE_CALL_TIMEOUT = float(
+    os.getenv("HOMEASSISTANT_STATE_CALL_TIMEOUT", "2.0")
+)
+HOMEASSISTANT_STATE_DEADLINE = float(os.getenv("HOMEASSISTANT_STATE_DEADLINE", "3.0"))
+
+HOMEASSISTANT_WEBSOCKET_URL = os.getenv("HOMEASSISTANT_WEBSOCKET_URL")
+HOMEASSISTANT_MIRROR_ENABLED = _env_bool("HOMEASSISTANT_MIRROR_ENABLED", False)
+HOMEASSISTANT_MIRROR_RECONNECT_MIN_DELAY = float(
+    os.getenv("HOMEASSISTANT_MIRROR_RECONNECT_MIN_DELAY", "1.0")
+)
+HOMEASSISTANT_MIRROR_RECONNECT_MAX_DELAY = float(
+    os.getenv("HOMEASSISTANT_MIRROR_RECONNECT_MAX_DELAY", "60.0")
+)
+
+ENTITIES_CACHE_TTL = float(os.getenv("ENTITIES_CACHE_TTL", "5.0"))
+ENTITIES_CACHE_STALE_TTL = float(os.getenv("ENTITIES_CACHE_STALE_TTL", "30.0"))
+ENTITIES_CACHE_MAX_ENTRIES = int(os.getenv("ENTITIES_CACHE_MAX_ENTRIES", "256"))
+# How long a caller's token stays trusted after Home Assistant accepted it, before mirror data is served to it again.
+HOMEASSISTANT_TOKEN_CHECK_TTL = float(
+    os.getenv("HOMEASSISTANT_TOKEN_CHECK_TTL", "60.0")
+)
+
+ENTITY_RECONCILE_INTERVAL = float(os.getenv("ENTITY_RECONCILE_INTERVAL", "0"))
+ENTITY_RECONCILE_ROOM_ID = (
+    int(os.environ["ENTITY_RECONCILE_ROOM_ID"])
+    if os.getenv("ENTITY_RECONCILE_ROOM_ID")
+    else None
+)
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+
+# "orm" builds GET /rooms through Prisma models, "sql" aggregates the payload in a single Postgres query.
+ROOM_LISTING_MODE = os.getenv("ROOM_LISTING_MODE", "orm")
+
+BATCH_SIZE_MAX = int(os.getenv("BATCH_SIZE_MAX", "500"))
+
+# bcrypt releases the GIL, so each worker thread can hash on its own core.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+# bcrypt cost factor. When unset it is calibrated at startup to the highest cost hashing within BCRYPT_TARGET_SECONDS.
+BCRYPT_ROUNDS = int(os.environ["BCRYPT_ROUNDS"]) if os.getenv("BCRYPT_ROUNDS") else None
+BCRYPT_TARGET_SECONDS = float(os.getenv("BCRYPT_TARGET_SECONDS", "0.25"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "30.0"))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000"))
+
+# "id" issues the session id as token; "signed" issues HMAC-signed tokens verified without a database lookup.
+SESSION_TOKEN_FORMAT = os.getenv("SESSION_TOKEN_FORMAT", "id")
+SESSION_TOKEN_SECRET = os.getenv("SESSION_TOKEN_SECRET")
+SESSION_TOKEN_TTL = float(os.getenv("SESSION_TOKEN_TTL", "86400"))
+SESSION_REVOCATION_CAPACITY = int(os.getenv("SESSION_REVOCATION_CAPACITY", "100000"))
+SESSION_REVOCATION_REBUILD_INTERVAL = float(
+    os.getenv("SESSION_REVOCATION_REBUILD_INTERVAL", "3600")
+)
+
+# Sessions older than SESSION_MAX_AGE seconds are invalidated, and invalid sessions older than SESSION_RETENTION are
+# deleted, by a sweep every SESSION_SWEEP_INTERVAL seconds (0 disables it).
+SESSION_MAX_AGE = float(os.getenv("SESSION_MAX_AGE", "86400"))
+SESSION_RETENTION = float(os.getenv("SESSION_RETENTION", "604800"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+SESSION_SWEEP_BATCH_SIZE = int(os.getenv("SESSION_SWEEP_BATCH_SIZE", "500"))
+SESSION_SWEEP_TIME_BUDGET = float(os.getenv("SESSION_SWEEP_TIME_BUDGET", "1.0"))
@@ -1,6 +1,7 @@
-from typing import Dict
+from typing import Dict, List
 
 import prisma
+import prisma.errors
 import prisma.models
 from pydantic import BaseModel
 
@@ -15,11 +16,33 @@ class CreateEntityResponse(BaseModel):
     message: str
 
 
+class NewEntity(BaseModel):
+    """
+    One entity to be created by a bulk creation request.
+    """
+
+    entityName: str
+    entityType: str
+
+
+class CreateEntitiesResponse(BaseModel):
+    """
+    Response model for the bulk creation of entities. Reports how many entities were created and how many were skipped because their name already exists in the room.
+    """
+
+    success: bool
+    created: int
+    skipped: int
+    message: str
+
+
 async def createEntity(
     entityName: str, entityType: str, roomId: int, attributes: Dict[str, str]
 ) -> CreateEntityResponse:
     """
     Allows the creation of a new entity in the Home Assistant setup. Requires details like entity ID, initial state, and attributes. This operation updates the database and also informs the HomeAssistant service to include the new entity.
+    The entity is inserted directly; a missing room or a duplicate name is reported from the foreign-key or unique-constraint
+    violation, so the happy path is a single statement and concurrent creates cannot race past the checks.
 
     Args:
         entityName (str): The name of the entity. Must be unique within the specific room.
@@ -30,23 +53,67 @@ async def createEntity(
     Returns:
         CreateEntityResponse: Response model for the creation of an entity. Provides confirmation and any relevant entity details upon successful creation.
     """
-    room = await prisma.models.Room.prisma().find_unique(where={"id": roomId})
-    if room is None:
+    try:
+        created_entity = await prisma.models.Entity.prisma().create(
+            data={"name": entityName, "entityType": entityType, "roomId": roomId}
+        )
+    except prisma.errors.ForeignKeyViolationError:
         return CreateEntityResponse(
             success=False, entityId=-1, message=f"No room found with ID {roomId}."
         )
-    existing_entity = await prisma.models.Entity.prisma().find_first(
-        where={"AND": [{"roomId": roomId}, {"name": entityName}]}
-    )
-    if existing_entity:
+    except prisma.errors.UniqueViolationError:
         return CreateEntityResponse(
             success=False,
             entityId=-1,
             message=f"Entity name '{entityName}' already exists in room {roomId}.",
         )
-    created_entity = await prisma.models.Entity.prisma().create(
-        data={"name": entityName, "entityType": entityType, "roomId": roomId}
-    )
     return CreateEntityResponse(
         success=True, entityId=created_entity.id, message="Entity successfully created."
     )
+
+
+async def createEntities(
+    roomId: int, entities: List[NewEntity]
+) -> CreateEntitiesResponse:
+    """
+    Creates many entities in one room with a single `create_many` statement.
+
+    Entities whose name already exists in the room, or appears earlier in the same request, are skipped by the database's
+    unique constraint rather than failing the batch. A missing room is detected through the foreign key.
+
+    Args:
+        roomId (int): The identifier of the room the entities are associated with.
+        entities (List[NewEntity]): The names and types of the entities to create.
+
+    Returns:
+        CreateEntitiesResponse: Response model for the bulk creation of entities.
+    """
+    if not entities:
+        return CreateEntitiesResponse(
+            success=True, created=0, skipped=0, message="No entities to create."
+        )
+    try:
+        created = await prisma.models.Entity.prisma().create_many(
+            data=[
+                {
+                    "name": entity.entityName,
+                    "entityType": entity.entityType,
+                    "roomId": roomId,
+                }
+                for entity in entities
+            ],
+            skip_duplicates=True,
+        )
+    except prisma.errors.ForeignKeyViolationError:
+        return CreateEntitiesResponse(
+            success=False,
+            created=0,
+            skipped=len(entities),
+            message=f"No room found with ID {roomId}.",
+        )
+    return CreateEntitiesResponse(
+        success=True,
+        created=created,
+        skipped=len(entities) - created,
+        message="Entities successfully created.",
+    )
@@ -1,17 +1,12 @@
 from typing import List
 
 import prisma
+import prisma.enums
+import prisma.errors
 import prisma.models
 from pydantic import BaseModel
 
-
-class Role(BaseModel):
-    """
-    Enum defining the permissible roles within the system.
-    """
-
-    ADMIN: str
-    USER: str
+Role = prisma.enums.Role
 
 
 class Entity(BaseModel):
@@ -32,36 +27,60 @@ class CreateRoomResponse(BaseModel):
     room_id: int
     room_name: str
     entities: List[Entity]
+    missing_entity_ids: List[int] = []
 
 
 async def createRoom(
-    room_name: str, entities: List[int], user_role: Role
+    room_name: str, entities: List[int], user_role: Role, userId: int
 ) -> CreateRoomResponse:
     """
     Allows the creation of a new room by specifying details such as room name and entities. This endpoint modifies the room layout and requires an admin level access.
+    The room insert and the assignment of all listed entities, done with a single set-based update, run in one transaction.
+    Entity IDs that do not exist are reported back in `missing_entity_ids` instead of failing the request.
 
     Args:
         room_name (str): The name of the room to create.
         entities (List[int]): Optional list of entity IDs to associate with the room upon creation.
         user_role (Role): Role of the user making the request, must be 'ADMIN' to proceed.
+        userId (int): The user who will own the room.
 
     Returns:
-        CreateRoomResponse: Response model returning details of the newly created room including any associated entities.
+        CreateRoomResponse: Response model returning details of the newly created room including any associated entities,
+            and the requested entity IDs that did not exist.
 
     Raises:
         PermissionError: If the user_role is not 'ADMIN'.
-        Exception: If room creation fails due to database errors or missing entities.
+        ValueError: If the owning user does not exist.
+        Exception: If room creation fails due to database errors.
     """
     if user_role != Role.ADMIN:
         raise PermissionError("Only users with ADMIN role can create rooms.")
-    new_room = await prisma.models.Room.prisma().create(data={"name": room_name})
+    wanted = list(dict.fromkeys(entities))
     associated_entities = []
-    for entity_id in entities:
-        entity = await prisma.models.Entity.prisma().update(
-            where={"id": entity_id}, data={"room_id": new_room.id}
-        )
-        associated_entities.append(entity)
+    try:
+        async with prisma.get_client().tx() as tx:
+            new_room = await prisma.models.Room.prisma(tx).create(
+                data={"name": room_name, "userId": userId}
+            )
+            if wanted:
+                await prisma.models.Entity.prisma(tx).update_many(
+                    where={"id": {"in": wanted}}, data={"roomId": new_room.id}
+                )
+                associated_entities = await prisma.models.Entity.prisma(tx).find_many(
+                    where={"roomId": new_room.id}, order={"id": "asc"}
+                )
+    except prisma.errors.ForeignKeyViolationError:
+        raise ValueError(f"No user found with ID {userId}")
+    found = {entity.id for entity in associated_entities}
     response = CreateRoomResponse(
-        room_id=new_room.id, room_name=new_room.name, entities=associated_entities
+        room_id=new_room.id,
+        room_name=new_room.name,
+        entities=[
+            Entity(id=entity.id, name=entity.name, entityType=entity.entityType)
+            for entity in associated_entities
+        ],
+        missing_entity_ids=[
+            entity_id for entity_id in wanted if entity_id not in found
+        ],
     )
     return response
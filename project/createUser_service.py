@@ -1,6 +1,6 @@
-import bcrypt
 import prisma
 import prisma.models
+import project.passwords
 from pydantic import BaseModel
 
 
@@ -21,21 +21,6 @@ class CreateUserResponse(BaseModel):
     user_id: int
 
 
-def hash_password(password: str) -> str:
-    """
-    Hashes a password using bcrypt.
-
-    Args:
-        password (str): The plaintext password.
-
-    Returns:
-        str: The hashed password.
-    """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode(), salt)
-    return hashed.decode()
-
-
 async def createUser(username: str, password: str, role: Role) -> CreateUserResponse:
     """
     Creates a new user. Endpoint takes a JSON payload with user details such as username, password, and roles.
@@ -54,7 +39,7 @@ async def createUser(username: str, password: str, role: Role) -> CreateUserResp
     )
     if existing_user:
         raise ValueError("Username already exists, please choose another username.")
-    hashed_password = hash_password(password)
+    hashed_password = await project.passwords.hash_password(password)
     new_user = await prisma.models.User.prisma().create(
         data={"email": username, "password": hashed_password, "role": role}
     )
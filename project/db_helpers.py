@@ -0,0 +1,22 @@
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+
+
+async def exists(model: Type[BaseModel], where: Dict[str, Any]) -> bool:
+    """
+    Checks whether any row of `model` matches `where`, without loading it.
+
+    The check is a `COUNT` over at most one row, so its cost does not depend on how many rows match.
+
+    Args:
+        model (Type[BaseModel]): A generated Prisma model class, e.g. `prisma.models.Session`.
+        where (Dict[str, Any]): The Prisma filter to match.
+
+    Returns:
+        bool: True if at least one row matches.
+
+    Example:
+        has_sessions = await exists(prisma.models.Session, {"userId": 1})
+    """
+    return await model.prisma().count(where=where, take=1) > 0
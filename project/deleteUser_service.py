@@ -1,5 +1,7 @@
 import prisma
 import prisma.models
+import project.auth
+import project.db_helpers
 from pydantic import BaseModel
 
 
@@ -15,6 +17,8 @@ class DeleteUserResponse(BaseModel):
 async def deleteUser(userId: int) -> DeleteUserResponse:
     """
     Deletes a user from the system by their user ID. It ensures that the right authorization levels are checked before deletion to maintain data integrity.
+    The guards are part of the delete statement itself, which only matches a user without sessions or rooms; existence
+    queries are run only when nothing was deleted, to explain why.
 
     Args:
     userId (int): The unique identifier of the user to be deleted.
@@ -22,24 +26,28 @@ async def deleteUser(userId: int) -> DeleteUserResponse:
     Returns:
     DeleteUserResponse: Response model indicating the result of the deleteUser operation. It will either confirm successful deletion or provide an error explaining why the deletion could not be performed.
     """
-    user = await prisma.models.User.prisma().find_unique(
-        where={"id": userId}, include={"sessions": True, "rooms": True}
+    deleted = await prisma.models.User.prisma().delete_many(
+        where={"id": userId, "sessions": {"none": {}}, "rooms": {"none": {}}}
     )
-    if user is None:
+    if deleted:
+        project.auth.forget_user(userId)
+        return DeleteUserResponse(
+            status="Success", message="prisma.models.User deleted successfully."
+        )
+    if not await project.db_helpers.exists(prisma.models.User, {"id": userId}):
         return DeleteUserResponse(
             status="Error", message="prisma.models.User not found."
         )
-    if len(user.sessions) > 0:
+    if await project.db_helpers.exists(prisma.models.Session, {"userId": userId}):
         return DeleteUserResponse(
             status="Error",
             message="prisma.models.User cannot be deleted because there are active sessions.",
         )
-    if len(user.rooms) > 0:
+    if await project.db_helpers.exists(prisma.models.Room, {"userId": userId}):
         return DeleteUserResponse(
             status="Error",
             message="prisma.models.User cannot be deleted because there are rooms associated with them.",
         )
-    await prisma.models.User.prisma().delete(where={"id": userId})
     return DeleteUserResponse(
-        status="Success", message="prisma.models.User deleted successfully."
+        status="Error", message="prisma.models.User could not be deleted."
     )
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import prisma
+import prisma.models
+import project.auth
+import project.config
+import project.tokens
+
+logger = logging.getLogger(__name__)
+
+counters: Dict[str, Any] = {
+    "sweeps": 0,
+    "expired": 0,
+    "purged": 0,
+    "errors": 0,
+    "last_duration_ms": 0.0,
+    "max_duration_ms": 0.0,
+    "last_budget_exhausted": False,
+}
+
+
+async def _batch(where: Dict[str, Any]) -> List[int]:
+    rows = await prisma.models.Session.prisma().find_many(
+        where=where,
+        take=project.config.SESSION_SWEEP_BATCH_SIZE,
+        order={"id": "asc"},
+    )
+    return [row.id for row in rows]
+
+
+async def expireBatch(cutoff: datetime) -> int:
+    """
+    Invalidates one batch of valid sessions created before `cutoff` and drops them from the session cache.
+
+    Returns:
+        int: The number of sessions invalidated.
+    """
+    ids = await _batch({"valid": True, "createdAt": {"lt": cutoff}})
+    if not ids:
+        return 0
+    expired = await prisma.models.Session.prisma().update_many(
+        where={"id": {"in": ids}, "valid": True}, data={"valid": False}
+    )
+    for session_id in ids:
+        project.tokens.revoke(session_id)
+        project.auth.forget_session(session_id)
+    return expired
+
+
+async def purgeBatch(cutoff: datetime) -> int:
+    """
+    Deletes one batch of invalid sessions created before `cutoff`.
+
+    Returns:
+        int: The number of sessions deleted.
+    """
+    ids = await _batch({"valid": False, "createdAt": {"lt": cutoff}})
+    if not ids:
+        return 0
+    return await prisma.models.Session.prisma().delete_many(
+        where={"id": {"in": ids}, "valid": False}
+    )
+
+
+async def sweepSessions(
+    budget: float = project.config.SESSION_SWEEP_TIME_BUDGET,
+) -> Dict[str, Any]:
+    """
+    Expires sessions older than SESSION_MAX_AGE and purges invalid sessions older than SESSION_RETENTION.
+
+    Work is done in batches of at most SESSION_SWEEP_BATCH_SIZE rows, each its own short statement, and the sweep stops
+    starting new batches once `budget` seconds have passed, leaving the rest to the next sweep. No statement therefore
+    locks more than one batch of rows.
+
+    Args:
+        budget (float): The time budget of this sweep, in seconds.
+
+    Returns:
+        Dict[str, Any]: The updated sweeper counters.
+    """
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    expire_cutoff = now - timedelta(seconds=project.config.SESSION_MAX_AGE)
+    # Invalid sessions are kept at least as long as their signed tokens live, so the revocation filter can be rebuilt.
+    purge_cutoff = now - timedelta(
+        seconds=max(project.config.SESSION_RETENTION, project.config.SESSION_TOKEN_TTL)
+    )
+    exhausted = False
+    for step, cutoff, counter in (
+        (expireBatch, expire_cutoff, "expired"),
+        (purgeBatch, purge_cutoff, "purged"),
+    ):
+        while True:
+            if time.perf_counter() - started >= budget:
+                exhausted = True
+                break
+            processed = await step(cutoff)
+            counters[counter] += processed
+            if processed < project.config.SESSION_SWEEP_BATCH_SIZE:
+                break
+    duration_ms = (time.perf_counter() - started) * 1000
+    counters["sweeps"] += 1
+    counters["last_duration_ms"] = duration_ms
+    counters["max_duration_ms"] = max(counters["max_duration_ms"], duration_ms)
+    counters["last_budget_exhausted"] = exhausted
+    return counters
+
+
+async def runPeriodically(
+    interval: float = project.config.SESSION_SWEEP_INTERVAL,
+) -> None:
+    """
+    Sweeps sessions every `interval` seconds until cancelled. Failures are logged and retried on the next tick.
+    """
+    while True:
+        try:
+            await sweepSessions()
+        except Exception:
+            counters["errors"] += 1
+            logger.exception("Session sweep failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,77 @@
+import functools
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, create_model
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    Parses a `fields=` query parameter such as "id,name" against the fields a resource exposes.
+
+    Args:
+        fields (Optional[str]): Comma-separated field names, or None/empty for the full representation.
+        allowed (Iterable[str]): The field names the resource exposes, in response order.
+
+    Returns:
+        Optional[List[str]]: The requested fields in response order, or None when every field is wanted.
+
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+    if not fields:
+        return None
+    allowed = list(allowed)
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}"
+        )
+    return [field for field in allowed if field in requested]
+
+
+def select_columns(fields: Sequence[str]) -> str:
+    """
+    Renders validated field names as a quoted SQL column list. Only pass names returned by `parse_fields`.
+    """
+    return ", ".join(f'"{field}"' for field in fields)
+
+
+def trimmed_model(
+    model: Type[BaseModel],
+    fields: Sequence[str],
+    overrides: Optional[Dict[str, Any]] = None,
+) -> Type[BaseModel]:
+    """
+    Returns a response model containing only `fields` of `model`, with the same types and defaults.
+
+    Args:
+        model (Type[BaseModel]): The full response model.
+        fields (Sequence[str]): The fields to keep.
+        overrides (Optional[Dict[str, Any]]): Replacement annotations for kept fields, e.g. a list of a trimmed nested model.
+
+    Returns:
+        Type[BaseModel]: The trimmed model; identical requests reuse the same class.
+    """
+    return _trimmed_model(
+        model, tuple(fields), tuple(sorted((overrides or {}).items()))
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _trimmed_model(
+    model: Type[BaseModel],
+    fields: Tuple[str, ...],
+    overrides: Tuple[Tuple[str, Any], ...],
+) -> Type[BaseModel]:
+    replaced = dict(overrides)
+    definitions = {}
+    for name in fields:
+        info = model.model_fields[name]
+        annotation = replaced.get(name, info.annotation)
+        default = ... if info.is_required() else info.default
+        definitions[name] = (annotation, default)
+    suffix = "_".join(fields)
+    return create_model(
+        f"{model.__name__}_{suffix}", __doc__=model.__doc__, **definitions
+    )
@@ -0,0 +1,78 @@
+from typing import List, Optional
+
+import prisma
+import prisma.models
+import project.config
+from pydantic import BaseModel
+
+
+class EntityRecord(BaseModel):
+    """
+    An entity resolved by id, including the room it belongs to.
+    """
+
+    id: int
+    name: str
+    entityType: str
+    roomId: int
+
+
+class GetEntitiesBatchResponse(BaseModel):
+    """
+    Entities resolved from a list of ids, in the order the ids were given, and the ids that matched no entity.
+    """
+
+    entities: List[EntityRecord]
+    missing_ids: List[int]
+
+
+def unique_ids(ids: List[int]) -> List[int]:
+    """
+    Drops repeated ids, keeping the first occurrence of each, and enforces the configured batch size.
+
+    Raises:
+        ValueError: If no ids are given or more than the configured maximum.
+    """
+    wanted = list(dict.fromkeys(ids))
+    if not wanted:
+        raise ValueError("At least one id is required")
+    if len(wanted) > project.config.BATCH_SIZE_MAX:
+        raise ValueError(
+            f"At most {project.config.BATCH_SIZE_MAX} ids can be requested at once"
+        )
+    return wanted
+
+
+async def getEntitiesBatch(
+    ids: List[int], userId: Optional[int] = None
+) -> GetEntitiesBatchResponse:
+    """
+    Resolves a list of entity ids with a single query.
+
+    Args:
+        ids (List[int]): The entity ids to resolve. Repeated ids are returned once.
+        userId (Optional[int]): Only resolve entities in rooms owned by this user, reporting others as missing; None
+            resolves the entities of every user.
+
+    Returns:
+        GetEntitiesBatchResponse: The entities in request order and the ids that were not found.
+    """
+    wanted = unique_ids(ids)
+    where = {"id": {"in": wanted}}
+    if userId is not None:
+        where["room"] = {"is": {"userId": userId}}
+    records = await prisma.models.Entity.prisma().find_many(where=where)
+    by_id = {record.id: record for record in records}
+    return GetEntitiesBatchResponse(
+        entities=[
+            EntityRecord(
+                id=record.id,
+                name=record.name,
+                entityType=record.entityType,
+                roomId=record.roomId,
+            )
+            for record in (by_id.get(entity_id) for entity_id in wanted)
+            if record is not None
+        ],
+        missing_ids=[entity_id for entity_id in wanted if entity_id not in by_id],
+    )
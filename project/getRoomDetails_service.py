@@ -1,8 +1,11 @@
-from typing import List
+from typing import List, Optional
 
 import prisma
 import prisma.models
-from homeassistant_api import Client
+import project.fieldsets
+import project.homeassistant_client
+import project.homeassistant_mirror
+import project.singleflight
 from pydantic import BaseModel
 
 
@@ -14,6 +17,8 @@ class EntityDetail(BaseModel):
     entityId: str
     entityName: str
     entityType: str
+    state: Optional[str] = None
+    stale: bool = False
 
 
 class RoomDetailsResponse(BaseModel):
@@ -25,35 +30,72 @@ class RoomDetailsResponse(BaseModel):
     entities: List[EntityDetail]
 
 
-async def getRoomDetails(roomId: str) -> RoomDetailsResponse:
+@project.singleflight.coalesce
+async def getRoomDetails(
+    roomId: str,
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror] = None,
+    fields: Optional[str] = None,
+) -> BaseModel:
     """
     Fetches detailed information about a specific room, including the entities within the room. This information is fetched using the HomeAssistant-API. Access is restricted to authenticated users.
 
     Args:
         roomId (str): The unique identifier for the room whose details are being requested.
+        client (HomeAssistantClient): The application-wide Home Assistant client owned by the server lifespan.
+        mirror (Optional[HomeAssistantMirror]): The websocket state mirror; when ready, each entity's live state is read from it.
+            Otherwise live states are fetched concurrently from the REST API, and entities whose lookup did not finish in
+            time are returned with `stale` set instead of failing the whole response.
+        fields (Optional[str]): Comma-separated response fields to return. Without "entities", neither the room's entities
+            nor their live states are fetched.
 
     Returns:
         RoomDetailsResponse: This response model encapsulates detailed information about a room, including all associated entities derived from the HomeAssistant-API.
+            A trimmed variant of it when `fields` is given.
 
     Example:
-        room_details = await getRoomDetails("1")
+        room_details = await getRoomDetails("1", ha_client)
     """
-    client = Client(
-        url="http://your-homeassistant-url", token="your-long-lived-access-token"
-    )
+    selected = project.fieldsets.parse_fields(fields, RoomDetailsResponse.model_fields)
+    with_entities = selected is None or "entities" in selected
     room = await prisma.models.Room.prisma().find_unique(
-        where={"id": int(roomId)}, include={"entities": True}
+        where={"id": int(roomId)},
+        include={"entities": True} if with_entities else None,
     )
     if room is None:
         raise ValueError("Room not found")
+    if not with_entities:
+        return project.fieldsets.trimmed_model(RoomDetailsResponse, selected)(
+            roomName=room.name
+        )
     entity_details = []
     if room.entities:
-        entity_details = [
-            EntityDetail(
-                entityId=str(entity.id),
-                entityName=entity.name,
-                entityType=entity.entityType,
+        entity_ids = {
+            entity.id: project.homeassistant_client.entity_id_for(
+                entity.name, entity.entityType
             )
             for entity in room.entities
-        ]
+        }
+        if mirror is not None and mirror.ready:
+            states = {
+                entity_id: mirror.get(entity_id) for entity_id in entity_ids.values()
+            }
+        else:
+            states = await client.get_states(entity_ids.values())
+        for entity in room.entities:
+            entity_id = entity_ids[entity.id]
+            ha_state = states.get(entity_id)
+            entity_details.append(
+                EntityDetail(
+                    entityId=str(entity.id),
+                    entityName=entity.name,
+                    entityType=entity.entityType,
+                    state=ha_state.get("state") if ha_state is not None else None,
+                    stale=entity_id not in states,
+                )
+            )
+    if selected is not None:
+        return project.fieldsets.trimmed_model(RoomDetailsResponse, selected)(
+            **{"roomName": room.name, "entities": entity_details}
+        )
     return RoomDetailsResponse(roomName=room.name, entities=entity_details)
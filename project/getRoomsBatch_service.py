@@ -0,0 +1,76 @@
+from typing import List, Optional
+
+import prisma
+import prisma.models
+import project.getEntitiesBatch_service
+from pydantic import BaseModel
+
+
+class EntityBasicInfo(BaseModel):
+    """
+    Basic information about an entity within a room.
+    """
+
+    id: int
+    name: str
+    entityType: str
+
+
+class RoomRecord(BaseModel):
+    """
+    A room resolved by id, with its entities.
+    """
+
+    id: int
+    name: str
+    entities: List[EntityBasicInfo]
+
+
+class GetRoomsBatchResponse(BaseModel):
+    """
+    Rooms resolved from a list of ids, in the order the ids were given, and the ids that matched no room.
+    """
+
+    rooms: List[RoomRecord]
+    missing_ids: List[int]
+
+
+async def getRoomsBatch(
+    ids: List[int], userId: Optional[int] = None
+) -> GetRoomsBatchResponse:
+    """
+    Resolves a list of room ids, together with their entities, with a single query.
+
+    Args:
+        ids (List[int]): The room ids to resolve. Repeated ids are returned once.
+        userId (Optional[int]): Only resolve rooms owned by this user, reporting other rooms as missing; None resolves
+            the rooms of every user.
+
+    Returns:
+        GetRoomsBatchResponse: The rooms in request order and the ids that were not found.
+    """
+    wanted = project.getEntitiesBatch_service.unique_ids(ids)
+    where = {"id": {"in": wanted}}
+    if userId is not None:
+        where["userId"] = userId
+    records = await prisma.models.Room.prisma().find_many(
+        where=where, include={"entities": True}
+    )
+    by_id = {record.id: record for record in records}
+    return GetRoomsBatchResponse(
+        rooms=[
+            RoomRecord(
+                id=record.id,
+                name=record.name,
+                entities=[
+                    EntityBasicInfo(
+                        id=entity.id, name=entity.name, entityType=entity.entityType
+                    )
+                    for entity in record.entities or []
+                ],
+            )
+            for record in (by_id.get(room_id) for room_id in wanted)
+            if record is not None
+        ],
+        missing_ids=[room_id for room_id in wanted if room_id not in by_id],
+    )
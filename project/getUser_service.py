@@ -1,8 +1,11 @@
+import asyncio
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 import prisma
 import prisma.models
+import project.fieldsets
+import project.singleflight
 from pydantic import BaseModel
 
 
@@ -42,7 +45,7 @@ class Room(BaseModel):
 
     id: int
     name: str
-    entities: List[Entity]
+    entities: Optional[List[Entity]] = None
 
 
 class UserDetailsResponse(BaseModel):
@@ -53,44 +56,92 @@ class UserDetailsResponse(BaseModel):
     id: int
     email: str
     role: Role
-    sessions: List[Session]
-    rooms: List[Room]
+    sessions: Optional[List[Session]] = None
+    rooms: Optional[List[Room]] = None
 
 
-async def getUser(userId: int) -> UserDetailsResponse:
+EXPANSIONS = ["sessions", "rooms", "rooms.entities"]
+
+
+async def _noop() -> None:
+    return None
+
+
+@project.singleflight.coalesce
+async def getUser(
+    userId: int, fields: Optional[str] = None, expand: Optional[str] = None
+) -> BaseModel:
     """
     Fetches a specific user's information by user ID. It ensures confidentiality by limiting data exposure to authorized roles.
 
+    Only the user itself is loaded by default; its sessions and rooms are left unset unless expanded. Expanded relations
+    are read with their own queries, run concurrently with the user lookup.
+
     Args:
         userId (int): The unique identifier for the user. It's used to fetch the specific user details from the database.
+        fields (Optional[str]): Comma-separated response fields to return, e.g. "id,email". Naming a relation here
+            expands it.
+        expand (Optional[str]): Comma-separated relations to load: "sessions", "rooms" and "rooms.entities".
 
     Returns:
         UserDetailsResponse: Response model representing detailed information of a user. Includes sensitive information covered under role-based access.
+            A trimmed variant of it when `fields` is given.
     """
-    user = await prisma.models.User.prisma().find_unique(
-        where={"id": userId},
-        include={"sessions": True, "rooms": {"include": {"entities": True}}},
+    selected = project.fieldsets.parse_fields(fields, UserDetailsResponse.model_fields)
+    expanded = set(project.fieldsets.parse_fields(expand, EXPANSIONS) or [])
+    if selected is not None:
+        expanded.update(name for name in ("sessions", "rooms") if name in selected)
+        expanded = {name for name in expanded if name.split(".")[0] in selected}
+    with_entities = "rooms.entities" in expanded
+    with_rooms = with_entities or "rooms" in expanded
+    user, sessions, rooms = await asyncio.gather(
+        prisma.models.User.prisma().find_unique(where={"id": userId}),
+        (
+            prisma.models.Session.prisma().find_many(
+                where={"userId": userId}, order={"id": "asc"}
+            )
+            if "sessions" in expanded
+            else _noop()
+        ),
+        (
+            prisma.models.Room.prisma().find_many(
+                where={"userId": userId},
+                include={"entities": True} if with_entities else None,
+                order={"id": "asc"},
+            )
+            if with_rooms
+            else _noop()
+        ),
     )
     if user is None:
         raise ValueError(f"No user found with ID {userId}")
-    user_details = UserDetailsResponse(
-        id=user.id,
-        email=user.email,
-        role=user.role,
-        sessions=[
+    values = {"id": user.id, "email": user.email, "role": user.role}
+    if sessions is not None:
+        values["sessions"] = [
             Session(id=session.id, createdAt=session.createdAt, valid=session.valid)
-            for session in user.sessions
-        ],
-        rooms=[
+            for session in sessions
+        ]
+    if rooms is not None:
+        values["rooms"] = [
             Room(
                 id=room.id,
                 name=room.name,
-                entities=[
-                    Entity(id=entity.id, name=entity.name, entityType=entity.entityType)
-                    for entity in room.entities
-                ],
+                entities=(
+                    [
+                        Entity(
+                            id=entity.id, name=entity.name, entityType=entity.entityType
+                        )
+                        for entity in room.entities or []
+                    ]
+                    if with_entities
+                    else None
+                ),
             )
-            for room in user.rooms
-        ],
-    )
+            for room in rooms
+        ]
+    if selected is not None:
+        return project.fieldsets.trimmed_model(UserDetailsResponse, selected)(
+            **{name: values.get(name) for name in selected}
+        )
+    user_details = UserDetailsResponse(**values)
     return user_details
@@ -0,0 +1,325 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+import project.circuit_breaker
+import project.config
+from pydantic import BaseModel
+
+
+class HomeAssistantInstance(BaseModel):
+    """
+    One upstream Home Assistant installation, e.g. one per building.
+    """
+
+    name: str
+    url: str
+    timeout: float
+
+
+def configured_instances(
+    spec: Optional[str] = project.config.HOMEASSISTANT_INSTANCES,
+) -> List[HomeAssistantInstance]:
+    """
+    Parses the configured upstream instances from a comma-separated list of `name=url` pairs.
+
+    Args:
+        spec (Optional[str]): The instance list, e.g. "north=https://ha-north.local,south=https://ha-south.local".
+            When empty, the single instance at HOMEASSISTANT_URL is used.
+
+    Returns:
+        List[HomeAssistantInstance]: The instances to query, in configuration order.
+    """
+    timeout = project.config.HOMEASSISTANT_INSTANCE_TIMEOUT
+    if not spec:
+        return [
+            HomeAssistantInstance(
+                name="default", url=project.config.HOMEASSISTANT_URL, timeout=timeout
+            )
+        ]
+    instances = []
+    for item in spec.split(","):
+        name, sep, url = item.strip().partition("=")
+        if not sep or not name or not url:
+            raise ValueError(f"Invalid Home Assistant instance entry: {item!r}")
+        instances.append(
+            HomeAssistantInstance(
+                name=name.strip(), url=url.strip().rstrip("/"), timeout=timeout
+            )
+        )
+    return instances
+
+
+def entity_id_for(name: str, entity_type: str) -> str:
+    """
+    Maps a stored entity onto its Home Assistant entity id, e.g. ("kitchen", "light") -> "light.kitchen".
+
+    Args:
+        name (str): The stored entity name, which may already be a full entity id.
+        entity_type (str): The stored entity type, used as the Home Assistant domain.
+
+    Returns:
+        str: The Home Assistant entity id.
+    """
+    if "." in name:
+        return name
+    return f"{entity_type}.{name}"
+
+
+class HomeAssistantClient:
+    """
+    Long-lived, pooled HTTP client for the Home Assistant REST API.
+
+    A single instance is connected in the application lifespan and passed to every service that talks to Home Assistant,
+    so connections are kept alive and reused across requests instead of paying a TCP+TLS handshake per call.
+    """
+
+    def __init__(
+        self,
+        base_url: str = project.config.HOMEASSISTANT_URL,
+        token: str = project.config.HOMEASSISTANT_TOKEN,
+        max_connections: int = project.config.HOMEASSISTANT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = project.config.HOMEASSISTANT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = project.config.HOMEASSISTANT_KEEPALIVE_EXPIRY,
+        http2: bool = project.config.HOMEASSISTANT_HTTP2,
+        connect_timeout: float = project.config.HOMEASSISTANT_CONNECT_TIMEOUT,
+        read_timeout: float = project.config.HOMEASSISTANT_READ_TIMEOUT,
+        pool_timeout: float = project.config.HOMEASSISTANT_POOL_TIMEOUT,
+        instances: Optional[List[HomeAssistantInstance]] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.instances = instances if instances is not None else configured_instances()
+        self.token = token
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            read_timeout, connect=connect_timeout, pool=pool_timeout
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._breakers: Dict[str, project.circuit_breaker.CircuitBreaker] = {}
+        self.requests_total = 0
+        self.requests_in_flight = 0
+        self.errors_total = 0
+
+    async def connect(self) -> None:
+        """
+        Opens the underlying connection pool. Called once from the application lifespan.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self.limits, timeout=self.timeout, http2=self.http2
+            )
+
+    async def disconnect(self) -> None:
+        """
+        Closes every pooled connection. Called once when the application shuts down.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def is_connected(self) -> bool:
+        return self._client is not None
+
+    def breaker(
+        self, base_url: Optional[str] = None
+    ) -> project.circuit_breaker.CircuitBreaker:
+        """
+        Returns the circuit breaker guarding the given Home Assistant instance, creating it on first use.
+        """
+        key = (base_url or self.base_url).rstrip("/")
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = project.circuit_breaker.CircuitBreaker(key)
+        return breaker
+
+    @asynccontextmanager
+    async def _guarded(self, base_url: Optional[str]) -> AsyncIterator[None]:
+        """
+        Wraps one upstream call with the instance's circuit breaker and the request counters.
+
+        Transport errors, timeouts, cancellations and 5xx responses count as failures; 4xx responses do not, since they
+        say nothing about the health of the upstream.
+        """
+        breaker = self.breaker(base_url)
+        breaker.before_call()
+        started = time.monotonic()
+        failed = True
+        self.requests_total += 1
+        self.requests_in_flight += 1
+        try:
+            yield
+            failed = False
+        except httpx.HTTPStatusError as e:
+            failed = e.response.status_code >= 500
+            self.errors_total += 1
+            raise
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            self.requests_in_flight -= 1
+            breaker.record(failed, time.monotonic() - started)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Sends a request to Home Assistant over the shared pool and raises for non-2xx responses.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The API path, relative to the Home Assistant base URL.
+            token (Optional[str]): Bearer token for the call; defaults to the configured long-lived token.
+            base_url (Optional[str]): Overrides the configured Home Assistant base URL.
+
+        Returns:
+            httpx.Response: The upstream response.
+
+        Raises:
+            CircuitOpenError: If the instance's circuit is open; the upstream is not contacted.
+        """
+        if self._client is None:
+            raise RuntimeError("Home Assistant client is not connected")
+        url = f"{(base_url or self.base_url).rstrip('/')}{path}"
+        headers = {"Authorization": f"Bearer {token or self.token}"}
+        async with self._guarded(base_url):
+            response = await self._client.request(
+                method, url, headers=headers, **kwargs
+            )
+            response.raise_for_status()
+        return response
+
+    async def get(
+        self, path: str, token: Optional[str] = None, **kwargs: Any
+    ) -> httpx.Response:
+        return await self.request("GET", path, token=token, **kwargs)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Sends a request over the shared pool without reading the body, so it can be consumed incrementally.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The API path, relative to the Home Assistant base URL.
+            token (Optional[str]): Bearer token for the call; defaults to the configured long-lived token.
+            base_url (Optional[str]): Overrides the configured Home Assistant base URL.
+
+        Yields:
+            httpx.Response: The upstream response with an unread body.
+
+        Raises:
+            CircuitOpenError: If the instance's circuit is open; the upstream is not contacted.
+        """
+        if self._client is None:
+            raise RuntimeError("Home Assistant client is not connected")
+        url = f"{(base_url or self.base_url).rstrip('/')}{path}"
+        headers = {"Authorization": f"Bearer {token or self.token}"}
+        request = self._client.build_request(method, url, headers=headers, **kwargs)
+        async with self._guarded(base_url):
+            response = await self._client.send(request, stream=True)
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError:
+                await response.aclose()
+                raise
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def get_states(
+        self,
+        entity_ids: Iterable[str],
+        concurrency: int = project.config.HOMEASSISTANT_STATE_CONCURRENCY,
+        call_timeout: float = project.config.HOMEASSISTANT_STATE_CALL_TIMEOUT,
+        deadline: float = project.config.HOMEASSISTANT_STATE_DEADLINE,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetches the live state of many entities concurrently, bounded by a semaphore and an overall deadline.
+
+        Lookups run at most `concurrency` at a time, each is abandoned after `call_timeout` seconds, and whatever has
+        not finished after `deadline` seconds is cancelled. Results are partial by design: an entity id missing from
+        the returned mapping could not be fetched in time and should be treated as stale, while a value of None means
+        Home Assistant does not know the entity.
+
+        Args:
+            entity_ids (Iterable[str]): The Home Assistant entity ids to look up.
+            concurrency (int): Maximum number of lookups in flight at once.
+            call_timeout (float): Per-lookup timeout in seconds.
+            deadline (float): Timeout for the whole batch in seconds.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: State objects keyed by entity id, for the lookups that completed.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(entity_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+            async with semaphore:
+                try:
+                    response = await asyncio.wait_for(
+                        self.get(f"/api/states/{entity_id}"), call_timeout
+                    )
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code == 404:
+                        return entity_id, None
+                    raise
+                return entity_id, response.json()
+
+        tasks = [asyncio.create_task(fetch(entity_id)) for entity_id in set(entity_ids)]
+        if not tasks:
+            return {}
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        states: Dict[str, Optional[Dict[str, Any]]] = {}
+        for task in done:
+            if task.exception() is None:
+                entity_id, state = task.result()
+                states[entity_id] = state
+        return states
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Reports request counters together with the current state of the connection pool.
+
+        Returns:
+            Dict[str, Any]: Pool configuration, connection counts and request counters.
+        """
+        connections = []
+        if self._client is not None:
+            pool = getattr(self._client._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+        return {
+            "connected": self.is_connected(),
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "connections_open": len(connections),
+            "connections_idle": sum(1 for c in connections if c.is_idle()),
+            "requests_total": self.requests_total,
+            "requests_in_flight": self.requests_in_flight,
+            "errors_total": self.errors_total,
+            "circuit_breakers": {
+                key: breaker.stats() for key, breaker in self._breakers.items()
+            },
+        }
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import project.config
+import websockets
+
+logger = logging.getLogger(__name__)
+
+
+def websocket_url(base_url: str) -> str:
+    """
+    Derives the Home Assistant websocket endpoint from its REST base URL.
+
+    Args:
+        base_url (str): The Home Assistant base URL, e.g. https://ha.example.com.
+
+    Returns:
+        str: The websocket API URL, e.g. wss://ha.example.com/api/websocket.
+    """
+    if base_url.startswith("https://"):
+        base_url = "wss://" + base_url[len("https://") :]
+    elif base_url.startswith("http://"):
+        base_url = "ws://" + base_url[len("http://") :]
+    return base_url.rstrip("/") + "/api/websocket"
+
+
+class HomeAssistantMirror:
+    """
+    In-memory mirror of Home Assistant entity states kept current by the websocket event stream.
+
+    A background task authenticates, subscribes to `state_changed` events and loads a full snapshot with `get_states`.
+    Every event is then applied incrementally. When the connection drops the mirror is marked not ready, so callers
+    fall back to the REST API, and the task reconnects with exponential backoff and resyncs from a fresh snapshot.
+    """
+
+    def __init__(
+        self,
+        url: str = project.config.HOMEASSISTANT_WEBSOCKET_URL
+        or websocket_url(project.config.HOMEASSISTANT_URL),
+        token: str = project.config.HOMEASSISTANT_TOKEN,
+        reconnect_min_delay: float = project.config.HOMEASSISTANT_MIRROR_RECONNECT_MIN_DELAY,
+        reconnect_max_delay: float = project.config.HOMEASSISTANT_MIRROR_RECONNECT_MAX_DELAY,
+    ) -> None:
+        self.url = url
+        self.token = token
+        self.reconnect_min_delay = reconnect_min_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.ready = False
+        self.version = 0
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.connects = 0
+        self.resyncs = 0
+        self.events_applied = 0
+        self.last_error: Optional[str] = None
+
+    async def start(self) -> None:
+        """
+        Starts the background subscription task. Called once from the application lifespan.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Cancels the background task and closes the websocket.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.ready = False
+
+    def get(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        return self._states.get(entity_id)
+
+    def states(self) -> List[Dict[str, Any]]:
+        return list(self._states.values())
+
+    async def _run(self) -> None:
+        delay = self.reconnect_min_delay
+        while True:
+            try:
+                await self._session()
+                delay = self.reconnect_min_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Home Assistant websocket dropped: %s", e)
+            self.ready = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_max_delay)
+
+    async def _session(self) -> None:
+        async with websockets.connect(self.url, max_size=None) as ws:
+            self.connects += 1
+            message = json.loads(await ws.recv())
+            if message.get("type") == "auth_required":
+                await ws.send(json.dumps({"type": "auth", "access_token": self.token}))
+                message = json.loads(await ws.recv())
+            if message.get("type") != "auth_ok":
+                raise ConnectionError(f"Authentication rejected: {message}")
+            await ws.send(
+                json.dumps(
+                    {"id": 1, "type": "subscribe_events", "event_type": "state_changed"}
+                )
+            )
+            await ws.send(json.dumps({"id": 2, "type": "get_states"}))
+            async for raw in ws:
+                self._handle(json.loads(raw))
+
+    def _handle(self, message: Dict[str, Any]) -> None:
+        if message.get("type") == "result":
+            if not message.get("success", False):
+                raise ConnectionError(f"Request {message.get('id')} failed: {message}")
+            if message.get("id") == 2:
+                self._states = {
+                    state["entity_id"]: state for state in message.get("result") or []
+                }
+                self.resyncs += 1
+                self.version += 1
+                self.ready = True
+        elif message.get("type") == "event":
+            data = message.get("event", {}).get("data", {})
+            entity_id = data.get("entity_id")
+            if entity_id is None:
+                return
+            new_state = data.get("new_state")
+            if new_state is None:
+                self._states.pop(entity_id, None)
+            else:
+                self._states[entity_id] = new_state
+            self.events_applied += 1
+            self.version += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "ready": self.ready,
+            "entities": len(self._states),
+            "connects": self.connects,
+            "resyncs": self.resyncs,
+            "events_applied": self.events_applied,
+            "last_error": self.last_error,
+        }
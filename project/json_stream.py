@@ -0,0 +1,78 @@
+import codecs
+import json
+from typing import Any, AsyncIterator
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_START = "-0123456789"
+_NUMBER_CHARS = "0123456789+-.eE"
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Incrementally parses a top-level JSON array, yielding each element as soon as it has been received in full.
+
+    Only the undecoded tail of the body is buffered, so peak memory is bounded by the largest single element rather
+    than by the size of the whole array.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The raw response body, e.g. `httpx.Response.aiter_bytes()`.
+
+    Yields:
+        Any: Each decoded array element, in order.
+
+    Raises:
+        ValueError: If the body is not a well-formed JSON array.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    finished = False
+    exhausted = False
+    iterator = chunks.__aiter__()
+    while not finished:
+        if not exhausted:
+            try:
+                chunk = await iterator.__anext__()
+                buffer += utf8.decode(chunk)
+            except StopAsyncIteration:
+                buffer += utf8.decode(b"", final=True)
+                exhausted = True
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                finished = True
+                pos += 1
+                break
+            if buffer[pos] == ",":
+                pos += 1
+                continue
+            if buffer[pos] in _NUMBER_START and not exhausted:
+                # raw_decode accepts any valid prefix of a number, e.g. "3" of "3.5", so wait until the characters
+                # that may belong to it are followed by something else.
+                token_end = pos
+                while token_end < len(buffer) and buffer[token_end] in _NUMBER_CHARS:
+                    token_end += 1
+                if token_end == len(buffer):
+                    break
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise ValueError("Truncated or malformed JSON array")
+                break
+            pos = end
+            yield value
+        buffer = buffer[pos:]
+        if exhausted and not finished:
+            raise ValueError("Truncated JSON array")
@@ -1,7 +1,10 @@
-from typing import List
+from typing import List, Optional
 
 import prisma
 import prisma.models
+import project.fieldsets
+import project.pagination
+import project.singleflight
 from pydantic import BaseModel
 
 
@@ -21,23 +24,71 @@ class GetRoomEntitiesResponse(BaseModel):
     """
 
     entities: List[Entity]
+    next_cursor: Optional[str] = None
 
 
-async def listEntitiesByRoom(roomId: int) -> GetRoomEntitiesResponse:
+@project.singleflight.coalesce
+async def listEntitiesByRoom(
+    roomId: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> BaseModel:
     """
     Lists all entities assigned to a specified room. Useful for both users and admins to overview the equipment or devices in a room.
     This list is pulled using synchronous calls to a Home-Assistant API modeled with prisma.
 
     Args:
     roomId (int): The unique identifier for a room whose entities are to be listed.
+    limit (Optional[int]): Maximum number of entities in the page, bounded by the configured maximum.
+    cursor (Optional[str]): The `next_cursor` of the previous page; omitted for the first page.
+    fields (Optional[str]): Comma-separated entity fields to return, e.g. "id,name". Only those columns are selected
+        from the database and the response model is trimmed to them.
 
     Returns:
     GetRoomEntitiesResponse: Model to handle the output of entities retrieved from a specific room based on the given room ID. This shows details of each entity.
+        A trimmed variant of it when `fields` is given.
     """
-    entities_data = await prisma.models.Entity.prisma().find_many(
-        where={"roomId": roomId}
+    selected = project.fieldsets.parse_fields(fields, Entity.model_fields)
+    if selected is not None:
+        return await listEntityFieldsByRoom(roomId, limit, cursor, selected)
+    entities_data, next_cursor = project.pagination.split_page(
+        await prisma.models.Entity.prisma().find_many(
+            **project.pagination.page_query(limit, cursor, where={"roomId": roomId})
+        ),
+        limit,
     )
     entities = [
         Entity(id=e.id, name=e.name, entityType=e.entityType) for e in entities_data
     ]
-    return GetRoomEntitiesResponse(entities=entities)
+    return GetRoomEntitiesResponse(entities=entities, next_cursor=next_cursor)
+
+
+async def listEntityFieldsByRoom(
+    roomId: int, limit: Optional[int], cursor: Optional[str], selected: List[str]
+) -> BaseModel:
+    """
+    Lists one page of a room's entities reading only the selected columns, plus the id needed for the cursor.
+    """
+    columns = project.fieldsets.select_columns(list(dict.fromkeys(["id", *selected])))
+    after = project.pagination.decode_cursor(cursor)
+    rows, next_cursor = project.pagination.split_page(
+        await prisma.get_client().query_raw(
+            f'SELECT {columns} FROM "Entity" WHERE "roomId" = $1 AND "id" > $2 '
+            'ORDER BY "id" LIMIT $3',
+            roomId,
+            after if after is not None else 0,
+            project.pagination.clamp_limit(limit) + 1,
+        ),
+        limit,
+    )
+    entity_model = project.fieldsets.trimmed_model(Entity, selected)
+    response_model = project.fieldsets.trimmed_model(
+        GetRoomEntitiesResponse,
+        ["entities", "next_cursor"],
+        {"entities": List[entity_model]},
+    )
+    return response_model(
+        entities=[entity_model(**{f: row[f] for f in selected}) for row in rows],
+        next_cursor=next_cursor,
+    )
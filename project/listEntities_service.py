@@ -1,6 +1,15 @@
-from typing import List
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
+import project.cache
+import project.circuit_breaker
+import project.config
+import project.homeassistant_client
+import project.homeassistant_mirror
+import project.json_stream
+import project.singleflight
 from pydantic import BaseModel
 
 
@@ -12,6 +21,7 @@ class EntityDetails(BaseModel):
     name: str
     type: str
     status: str
+    origin: Optional[str] = None
 
 
 class GetEntitiesResponse(BaseModel):
@@ -20,31 +30,375 @@ class GetEntitiesResponse(BaseModel):
     """
 
     entities: List[EntityDetails]
+    unavailable: List[str] = []
 
 
-async def listEntities(authorization: str) -> GetEntitiesResponse:
+entities_cache = project.cache.StaleWhileRevalidateCache(
+    ttl=project.config.ENTITIES_CACHE_TTL,
+    stale_ttl=project.config.ENTITIES_CACHE_STALE_TTL,
+    max_entries=project.config.ENTITIES_CACHE_MAX_ENTRIES,
+)
+
+_mirror_response: Optional[Tuple[int, GetEntitiesResponse]] = None
+
+# Headroom over the latency budget for merging results, so per-instance timeouts clamped to the budget fire first.
+_BUDGET_GRACE = 0.5
+
+verified_tokens = project.cache.TTLCache(
+    ttl=project.config.HOMEASSISTANT_TOKEN_CHECK_TTL,
+    max_entries=project.config.ENTITIES_CACHE_MAX_ENTRIES,
+)
+
+
+async def verifyToken(
+    authorization: str,
+    client: project.homeassistant_client.HomeAssistantClient,
+    instance: project.homeassistant_client.HomeAssistantInstance,
+) -> None:
+    """
+    Checks that Home Assistant accepts the caller's token before mirror data, which is read with the server's own
+    token, is served to it. Accepted tokens are remembered for HOMEASSISTANT_TOKEN_CHECK_TTL seconds.
+
+    Args:
+        authorization (str): The caller's Home Assistant token.
+        client (HomeAssistantClient): The application-wide Home Assistant client owned by the server lifespan.
+        instance (HomeAssistantInstance): The instance the mirror follows.
+
+    Raises:
+        ValueError: If Home Assistant rejects the token.
+    """
+    key = (instance.name, project.cache.token_key(authorization))
+    if verified_tokens.get(key):
+        return
+    try:
+        await client.request("GET", "/api/", token=authorization, base_url=instance.url)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code in (401, 403):
+            raise ValueError("Unauthorized: Home Assistant rejected the token.")
+        raise
+    verified_tokens.set(key, True)
+
+
+def entityFromRecord(
+    entity: Dict[str, Any], origin: Optional[str] = None
+) -> EntityDetails:
+    """
+    Converts one element of the upstream `/api/entities` payload into an EntityDetails model.
+
+    Args:
+        entity (Dict[str, Any]): The upstream entity record.
+        origin (Optional[str]): Name of the Home Assistant instance the record came from.
+
+    Returns:
+        EntityDetails: The entity's name, type and status.
+    """
+    return EntityDetails(
+        name=entity["name"],
+        type=entity["type"],
+        status=entity.get("status", "unknown"),
+        origin=origin,
+    )
+
+
+def entityFromState(
+    state: Dict[str, Any], origin: Optional[str] = None
+) -> EntityDetails:
+    """
+    Converts a Home Assistant state object, as published on the websocket API, into an EntityDetails model.
+
+    Args:
+        state (Dict[str, Any]): The Home Assistant state object.
+        origin (Optional[str]): Name of the Home Assistant instance the state came from.
+
+    Returns:
+        EntityDetails: The entity's name, type (its domain) and status (its state).
+    """
+    entity_id = state["entity_id"]
+    return EntityDetails(
+        name=state.get("attributes", {}).get("friendly_name", entity_id),
+        type=entity_id.split(".", 1)[0],
+        status=state.get("state", "unknown"),
+        origin=origin,
+    )
+
+
+def entitiesFromMirror(
+    mirror: project.homeassistant_mirror.HomeAssistantMirror,
+    origin: Optional[str] = None,
+) -> GetEntitiesResponse:
+    """
+    Builds the entity listing from the websocket mirror. The response is rebuilt only when the mirror has changed.
+
+    Args:
+        mirror (HomeAssistantMirror): A mirror that is ready to serve.
+        origin (Optional[str]): Name of the Home Assistant instance the mirror follows.
+
+    Returns:
+        GetEntitiesResponse: The entity listing as of the mirror's current version.
+    """
+    global _mirror_response
+    if _mirror_response is None or _mirror_response[0] != mirror.version:
+        version = mirror.version
+        response = GetEntitiesResponse(
+            entities=[entityFromState(state, origin) for state in mirror.states()]
+        )
+        _mirror_response = (version, response)
+    return _mirror_response[1]
+
+
+def mirroredInstance(
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror],
+) -> Optional[project.homeassistant_client.HomeAssistantInstance]:
+    """
+    Returns the configured instance followed by the websocket mirror, if the mirror is ready to serve it.
+    """
+    if mirror is None or not mirror.ready:
+        return None
+    for instance in client.instances:
+        if instance.url.rstrip("/") == client.base_url:
+            return instance
+    return None
+
+
+async def fetchInstanceEntities(
+    instance: project.homeassistant_client.HomeAssistantInstance,
+    authorization: str,
+    client: project.homeassistant_client.HomeAssistantClient,
+) -> List[EntityDetails]:
+    """
+    Fetches the entity list of a single Home Assistant instance and tags every entity with the instance name.
+    """
+    response = await client.get(
+        "/api/entities", token=authorization, base_url=instance.url
+    )
+    return [entityFromRecord(entity, instance.name) for entity in response.json()]
+
+
+@project.singleflight.coalesce
+async def fetchEntities(
+    authorization: str,
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror] = None,
+    budget: Optional[float] = None,
+) -> GetEntitiesResponse:
+    """
+    Fetches the entity list from every configured Home Assistant instance concurrently, bypassing the cache.
+
+    Each instance is bounded by its own timeout, clamped to `budget`, so the call takes as long as the slowest healthy
+    instance. Instances that fail or time out are listed in `unavailable` and the entities of the others are still
+    returned.
+
+    Args:
+        authorization (str): Authorization token forwarded to Home Assistant.
+        client (HomeAssistantClient): The application-wide Home Assistant client owned by the server lifespan.
+        mirror (Optional[HomeAssistantMirror]): The websocket state mirror, used for the instance it follows.
+        budget (Optional[float]): Upper bound for every instance's timeout, in seconds.
+
+    Returns:
+        GetEntitiesResponse: The merged upstream entity list.
+
+    Raises:
+        Exception: The first upstream error, if no instance answered.
+    """
+    mirrored = mirroredInstance(client, mirror)
+
+    async def fetch(
+        instance: project.homeassistant_client.HomeAssistantInstance,
+    ) -> List[EntityDetails]:
+        if instance is mirrored:
+            await verifyToken(authorization, client, instance)
+            return entitiesFromMirror(mirror, instance.name).entities
+        return await fetchInstanceEntities(instance, authorization, client)
+
+    results = await asyncio.gather(
+        *(
+            asyncio.wait_for(
+                fetch(instance),
+                instance.timeout if budget is None else min(instance.timeout, budget),
+            )
+            for instance in client.instances
+        ),
+        return_exceptions=True,
+    )
+    entities: List[EntityDetails] = []
+    unavailable: List[str] = []
+    errors: List[BaseException] = []
+    for instance, result in zip(client.instances, results):
+        if isinstance(result, BaseException):
+            unavailable.append(instance.name)
+            errors.append(result)
+        else:
+            entities.extend(result)
+    if errors and len(errors) == len(client.instances):
+        raise errors[0]
+    return GetEntitiesResponse(entities=entities, unavailable=unavailable)
+
+
+async def listEntities(
+    authorization: str,
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror] = None,
+) -> GetEntitiesResponse:
     """
     Retrieves a list of all entities managed by Home Assistant. Each entity includes details such as name, type, and status.
-    An HTTP client is used to fetch this data from Home Assistant API. Authentication is required to ensure only authorized users can access this information.
+    The shared, pooled Home Assistant client is used to fetch this data from every configured Home Assistant instance
+    concurrently, and results are merged, tagged with their origin, and cached per authorization token with
+    stale-while-revalidate refreshes so polling clients do not add upstream load. The whole upstream fetch is bounded by a
+    latency budget, and when it runs out, the circuit is open or the upstream is unreachable or answers with a 5xx, the
+    last cached listing is returned instead; 4xx responses are raised. When a single instance is configured
+    and the websocket mirror is ready, the listing is served from memory without any upstream round trip once Home
+    Assistant has accepted the caller's token. Authentication is required to ensure only authorized users can access this information.
 
     Args:
         authorization (str): Authorization token to verify if the user has the necessary permissions to access this data.
+        client (HomeAssistantClient): The application-wide Home Assistant client owned by the server lifespan.
+        mirror (Optional[HomeAssistantMirror]): The websocket state mirror, if enabled.
 
     Returns:
         GetEntitiesResponse: Response model returning a list of all entities managed by Home Assistant, each with details such as name, type, and status.
     """
-    url = "https://your-homeassistant-api-domain.com/api/entities"
-    headers = {"Authorization": f"Bearer {authorization}"}
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        response.raise_for_status()
-        entities_data = response.json()
-    entities = [
-        EntityDetails(
-            name=entity["name"],
-            type=entity["type"],
-            status=entity.get("status", "unknown"),
-        )
-        for entity in entities_data
+    mirrored = mirroredInstance(client, mirror)
+    if mirrored is not None and len(client.instances) == 1:
+        await verifyToken(authorization, client, mirrored)
+        return entitiesFromMirror(mirror, mirrored.name)
+    key = project.cache.token_key(authorization)
+    try:
+        budget = project.config.HOMEASSISTANT_LATENCY_BUDGET
+        async with asyncio.timeout(budget + _BUDGET_GRACE):
+            return await entities_cache.get_or_load(
+                key, lambda: fetchEntities(authorization, client, mirror, budget)
+            )
+    except (
+        TimeoutError,
+        httpx.TransportError,
+        httpx.HTTPStatusError,
+        project.circuit_breaker.CircuitOpenError,
+    ) as e:
+        # A 4xx, such as a revoked token, is the caller's problem and must not be papered over with cached data.
+        if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+            entities_cache.pop(key)
+            raise
+        fallback = entities_cache.fallback(key)
+        if fallback is None:
+            raise
+        return fallback
+
+
+async def _idle_timeout(
+    chunks: AsyncIterator[bytes], timeout: float
+) -> AsyncIterator[bytes]:
+    """
+    Passes `chunks` through, raising TimeoutError when the next one takes longer than `timeout` seconds to arrive.
+    """
+    iterator = chunks.__aiter__()
+    while True:
+        try:
+            async with asyncio.timeout(timeout):
+                chunk = await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+        yield chunk
+
+
+async def streamEntities(
+    authorization: str,
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror] = None,
+    unavailable: Optional[List[str]] = None,
+) -> AsyncIterator[EntityDetails]:
+    """
+    Yields entities one at a time while the upstream bodies are still arriving, instead of materialising whole payloads
+    and a second list of models. Every configured instance is streamed concurrently; its timeout bounds the wait for
+    the response headers and for each body chunk, so a slow reader does not cut a large body short. The instance
+    followed by the websocket mirror is served from memory when the mirror is ready.
+
+    Args:
+        authorization (str): Authorization token forwarded to Home Assistant.
+        client (HomeAssistantClient): The application-wide Home Assistant client owned by the server lifespan.
+        mirror (Optional[HomeAssistantMirror]): The websocket state mirror, if enabled.
+        unavailable (Optional[List[str]]): Receives the names of instances that failed or timed out.
+
+    Yields:
+        EntityDetails: Each entity, in arrival order.
+
+    Raises:
+        Exception: The first upstream error, if no instance answered.
+    """
+    mirrored = mirroredInstance(client, mirror)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1024)
+    done = object()
+    errors: List[BaseException] = []
+
+    async def produce(
+        instance: project.homeassistant_client.HomeAssistantInstance,
+    ) -> None:
+        try:
+            if instance is mirrored:
+                await verifyToken(authorization, client, instance)
+                for state in mirror.states():
+                    await queue.put(entityFromState(state, instance.name))
+                return
+            # The instance timeout bounds the wait for the response headers and then every gap between body chunks,
+            # not the whole transfer, which also includes time blocked on a slow reader.
+            async with asyncio.timeout(instance.timeout) as headers_deadline:
+                async with client.stream(
+                    "GET", "/api/entities", token=authorization, base_url=instance.url
+                ) as response:
+                    headers_deadline.reschedule(None)
+                    async for entity in project.json_stream.iter_json_array(
+                        _idle_timeout(response.aiter_bytes(), instance.timeout)
+                    ):
+                        await queue.put(entityFromRecord(entity, instance.name))
+        except Exception as e:
+            errors.append(e)
+            if unavailable is not None:
+                unavailable.append(instance.name)
+        await queue.put(done)
+
+    producers = [
+        asyncio.create_task(produce(instance)) for instance in client.instances
     ]
-    return GetEntitiesResponse(entities=entities)
+    try:
+        remaining = len(producers)
+        while remaining:
+            item = await queue.get()
+            if item is done:
+                remaining -= 1
+                continue
+            yield item
+        if errors and len(errors) == len(producers):
+            raise errors[0]
+    finally:
+        for producer in producers:
+            producer.cancel()
+
+
+async def streamEntitiesJson(
+    authorization: str,
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Encodes the streamed entities as a GetEntitiesResponse JSON document, chunk by chunk. The opening chunk is only
+    produced once an upstream has answered, so awaiting it surfaces upstream errors before any byte is sent. Instances
+    that failed or timed out are listed in `unavailable`, which is written last.
+
+    Args:
+        authorization (str): Authorization token forwarded to Home Assistant.
+        client (HomeAssistantClient): The application-wide Home Assistant client owned by the server lifespan.
+        mirror (Optional[HomeAssistantMirror]): The websocket state mirror, if enabled.
+
+    Yields:
+        bytes: Consecutive fragments of the JSON response body.
+    """
+    unavailable: List[str] = []
+    entities = streamEntities(authorization, client, mirror, unavailable)
+    first = await anext(entities, None)
+    if first is None:
+        yield b'{"entities":['
+    else:
+        yield b'{"entities":[' + first.model_dump_json().encode()
+        async for entity in entities:
+            yield b"," + entity.model_dump_json().encode()
+    yield b'],"unavailable":' + json.dumps(unavailable).encode() + b"}"
@@ -1,7 +1,12 @@
-from typing import List
+import json
+from typing import List, Optional
 
 import prisma
 import prisma.models
+import project.auth
+import project.fieldsets
+import project.pagination
+import project.singleflight
 from pydantic import BaseModel
 
 
@@ -39,36 +44,161 @@ class GetRoomsResponse(BaseModel):
     """
 
     rooms: List[RoomDetailed]
+    next_cursor: Optional[str] = None
 
 
-async def listRooms(request: GetRoomsRequest) -> GetRoomsResponse:
+async def roomOwner(authorization: str, all_users: bool = False) -> Optional[int]:
+    """
+    Resolves whose rooms a caller may list.
+
+    Args:
+        authorization (str): The caller's session token.
+        all_users (bool): Whether the caller asks for the rooms of every user, which only admins may do.
+
+    Returns:
+        Optional[int]: The user ID to filter rooms by, or None for every user's rooms.
+
+    Raises:
+        ValueError: If the token is invalid, or a non-admin asks for every user's rooms.
+    """
+    session = await project.auth.resolve_session(authorization)
+    if not all_users:
+        return session.user_id
+    if not session.is_admin:
+        raise ValueError("Unauthorized: Only admins can list the rooms of all users.")
+    return None
+
+
+@project.singleflight.coalesce
+async def listRooms(
+    request: GetRoomsRequest,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    userId: Optional[int] = None,
+) -> BaseModel:
     """
     Retrieves a list of all rooms. Each room includes details such as name and associated entities. This endpoint will utilize the HomeAssistant-API to gather room data and is protected to ensure only authenticated users access it.
 
     Args:
         request (GetRoomsRequest): Request model for fetching all rooms. No body or query parameters are required as this is a simple GET request to list all rooms.
+        limit (Optional[int]): Maximum number of rooms in the page, bounded by the configured maximum.
+        cursor (Optional[str]): The `next_cursor` of the previous page; omitted for the first page.
+        fields (Optional[str]): Comma-separated room fields to return, e.g. "id,name". Entities are only loaded when
+            "entities" is among them.
+        userId (Optional[int]): Only list the rooms owned by this user; None lists the rooms of every user.
 
     Returns:
         GetRoomsResponse: Response model representing a list of rooms with their details and associated entities.
+            A trimmed variant of it when `fields` is given.
     """
-    rooms_records = await prisma.models.Room.prisma().find_many(
-        include={"entities": True}
+    selected = project.fieldsets.parse_fields(fields, RoomDetailed.model_fields)
+    with_entities = selected is None or "entities" in selected
+    rooms_records, next_cursor = project.pagination.split_page(
+        await prisma.models.Room.prisma().find_many(
+            include={"entities": True} if with_entities else None,
+            **project.pagination.page_query(
+                limit, cursor, where={"userId": userId} if userId is not None else None
+            ),
+        ),
+        limit,
     )
+    room_model = RoomDetailed
+    response_model = GetRoomsResponse
+    if selected is not None:
+        room_model = project.fieldsets.trimmed_model(RoomDetailed, selected)
+        response_model = project.fieldsets.trimmed_model(
+            GetRoomsResponse, ["rooms", "next_cursor"], {"rooms": List[room_model]}
+        )
     room_details_list = []
     for room_record in rooms_records:
-        entity_list = (
-            [
-                EntityBasicInfo(
-                    id=entity.id, name=entity.name, entityType=entity.entityType
-                )
-                for entity in room_record.entities
-            ]
-            if room_record.entities
-            else []
-        )
-        room_details = RoomDetailed(
-            id=room_record.id, name=room_record.name, entities=entity_list
+        values = {"id": room_record.id, "name": room_record.name}
+        if with_entities:
+            values["entities"] = (
+                [
+                    EntityBasicInfo(
+                        id=entity.id, name=entity.name, entityType=entity.entityType
+                    )
+                    for entity in room_record.entities
+                ]
+                if room_record.entities
+                else []
+            )
+        room_details = room_model(
+            **{name: values[name] for name in room_model.model_fields}
         )
         room_details_list.append(room_details)
-    response = GetRoomsResponse(rooms=room_details_list)
+    response = response_model(rooms=room_details_list, next_cursor=next_cursor)
     return response
+
+
+ROOMS_JSON_QUERY = """
+WITH page AS (
+    SELECT r."id", r."name"
+    FROM "Room" r
+    WHERE r."id" > $1 AND ($3::int IS NULL OR r."userId" = $3)
+    ORDER BY r."id"
+    LIMIT $2
+)
+SELECT
+    COALESCE(
+        json_agg(
+            json_build_object(
+                'id', p."id",
+                'name', p."name",
+                'entities', COALESCE(e."entities", '[]'::json)
+            )
+            ORDER BY p."id"
+        ),
+        '[]'::json
+    )::text AS "rooms",
+    MAX(p."id") AS "lastId",
+    EXISTS (
+        SELECT 1 FROM "Room"
+        WHERE "id" > (SELECT MAX("id") FROM page) AND ($3::int IS NULL OR "userId" = $3)
+    ) AS "hasMore"
+FROM page p
+LEFT JOIN LATERAL (
+    SELECT json_agg(
+        json_build_object(
+            'id', en."id", 'name', en."name", 'entityType', en."entityType"
+        )
+        ORDER BY en."id"
+    ) AS "entities"
+    FROM "Entity" en
+    WHERE en."roomId" = p."id"
+) e ON true
+"""
+
+
+@project.singleflight.coalesce
+async def listRoomsJson(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    userId: Optional[int] = None,
+) -> str:
+    """
+    Produces the GetRoomsResponse JSON document for one page of rooms in a single SQL query.
+
+    Postgres aggregates each room's entities and the page itself into JSON, so no Prisma or Pydantic objects are built
+    per room or entity; the service only splices the next cursor into the text it receives.
+
+    Args:
+        limit (Optional[int]): Maximum number of rooms in the page, bounded by the configured maximum.
+        cursor (Optional[str]): The `next_cursor` of the previous page; omitted for the first page.
+        userId (Optional[int]): Only list the rooms owned by this user; None lists the rooms of every user.
+
+    Returns:
+        str: A JSON document with the same shape as GetRoomsResponse.
+    """
+    after = project.pagination.decode_cursor(cursor)
+    row = await prisma.get_client().query_first(
+        ROOMS_JSON_QUERY,
+        after if after is not None else 0,
+        project.pagination.clamp_limit(limit),
+        userId,
+    )
+    next_cursor = None
+    if row["hasMore"]:
+        next_cursor = project.pagination.encode_cursor(row["lastId"])
+    return f'{{"rooms":{row["rooms"]},"next_cursor":{json.dumps(next_cursor)}}}'
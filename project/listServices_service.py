@@ -1,7 +1,9 @@
-from typing import List
+from typing import List, Optional
 
 import prisma
 import prisma.models
+import project.pagination
+import project.singleflight
 from pydantic import BaseModel
 
 
@@ -28,23 +30,36 @@ class GetServicesResponse(BaseModel):
     """
 
     services: List[ServiceDescription]
+    next_cursor: Optional[str] = None
 
 
-async def listServices(request: GetServicesRequest) -> GetServicesResponse:
+@project.singleflight.coalesce
+async def listServices(
+    request: GetServicesRequest,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> GetServicesResponse:
     """
     Retrieves a list of all services available in the Home Assistant environment. It returns details like service name, domain, and description. This function queries the internal system database to fetch the services and responds with a structured overview of each service.
 
     Args:
         request (GetServicesRequest): API request model to retrieve all services available in the system. Authentication and role authorization is required to access this endpoint, ensuring that only authenticated users (admins and users) can query for available services.
+        limit (Optional[int]): Maximum number of services in the page, bounded by the configured maximum.
+        cursor (Optional[str]): The `next_cursor` of the previous page; omitted for the first page.
 
     Returns:
         GetServicesResponse: Provides a user-friendly list of all available services in the system extracted and adapted from HomeAssistant-API. Each service contains essential information necessary for understanding and potentially installing the service.
     """
-    service_records = await prisma.models.Service.prisma().find_many()
+    service_records, next_cursor = project.pagination.split_page(
+        await prisma.models.Service.prisma().find_many(
+            **project.pagination.page_query(limit, cursor)
+        ),
+        limit,
+    )
     descriptions = [
         ServiceDescription(
             serviceName=record.serviceName, installationCmd=record.installationCmd
         )
         for record in service_records
     ]
-    return GetServicesResponse(services=descriptions)
+    return GetServicesResponse(services=descriptions, next_cursor=next_cursor)
@@ -1,5 +1,9 @@
 import prisma
 import prisma.models
+import project.auth
+import project.config
+import project.passwords
+import project.tokens
 from pydantic import BaseModel, ValidationError
 
 
@@ -14,6 +18,7 @@ class LoginResponse(BaseModel):
 async def login(username: str, password: str) -> LoginResponse:
     """
     Authenticates a user by their username and password. Successful authentication returns a session token, which is necessary for interacting with protected endpoints.
+    A stored hash made with a lower bcrypt cost factor than the configured one is replaced on successful login.
 
     Args:
         username (str): The username of the user trying to login.
@@ -26,9 +31,21 @@ async def login(username: str, password: str) -> LoginResponse:
         ValidationError: If authentication fails due to invalid credentials.
     """
     user = await prisma.models.User.prisma().find_unique(where={"email": username})
-    if not user or user.password != password:
+    if not user or not await project.passwords.verify_password(password, user.password):
         raise ValidationError("Invalid username or password")
+    if project.passwords.needs_rehash(user.password):
+        await prisma.models.User.prisma().update(
+            where={"id": user.id},
+            data={"password": await project.passwords.hash_password(password)},
+        )
     session = await prisma.models.Session.prisma().create(
         data={"userId": user.id, "valid": True}
     )
-    return LoginResponse(session_token=str(session.id))
+    if project.config.SESSION_TOKEN_FORMAT == project.tokens.SIGNED:
+        token = project.tokens.issue(session.id, user.id, user.role)
+    else:
+        token = str(session.id)
+    project.auth.remember_session(
+        project.auth.SessionInfo(session_id=session.id, user_id=user.id, role=user.role)
+    )
+    return LoginResponse(session_token=token)
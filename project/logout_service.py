@@ -1,5 +1,7 @@
 import prisma
 import prisma.models
+import project.auth
+import project.tokens
 from pydantic import BaseModel
 
 
@@ -17,16 +19,21 @@ async def logout(token: str) -> LogoutResponse:
     Logs out a user by invalidating their session token. This helps in maintaining the security by ensuring that the sessions remain active only until the user wishes to keep them.
 
     Args:
-        token (str): The session token that the user wants to invalidate for logging out.
+        token (str): The session token that the user wants to invalidate for logging out. Both plain session ids and
+            signed tokens are accepted; a signed token may already be expired.
 
     Returns:
         LogoutResponse: Provides a confirmation message indicating whether the session token was successfully invalidated.
     """
-    session = await prisma.models.Session.prisma().find_unique(where={"id": int(token)})
-    if session and session.valid:
-        await prisma.models.Session.prisma().update(
-            where={"id": int(token)}, data={"valid": False}
-        )
+    session_id = project.tokens.session_id_of(token)
+    if session_id is None:
+        return LogoutResponse(status="failure", message="Invalid session token.")
+    project.auth.forget_session(session_id)
+    project.tokens.revoke(session_id)
+    invalidated = await prisma.models.Session.prisma().update_many(
+        where={"id": session_id, "valid": True}, data={"valid": False}
+    )
+    if invalidated:
         return LogoutResponse(
             status="success", message="Session invalidated successfully."
         )
@@ -0,0 +1,102 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import project.config
+
+T = TypeVar("T")
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Encodes the id of the last row of a page into an opaque cursor for the next page.
+
+    Args:
+        last_id (int): The id of the last row returned.
+
+    Returns:
+        str: A URL-safe cursor string.
+    """
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (Optional[str]): The cursor received from the client, if any.
+
+    Returns:
+        Optional[int]: The id after which the next page starts, or None for the first page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid pagination cursor")
+    return last_id
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """
+    Bounds a requested page size to between 1 and the configured maximum.
+    """
+    if limit is None:
+        return project.config.PAGE_SIZE_DEFAULT
+    return max(1, min(limit, project.config.PAGE_SIZE_MAX))
+
+
+def page_query(
+    limit: Optional[int], cursor: Optional[str], where: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Builds `find_many` arguments for one page of a keyset-paginated listing ordered by id.
+
+    One row more than the page size is requested, so the caller can tell whether another page follows. Pages are
+    selected with `id > last id` rather than an offset, so each page costs an index range scan no matter how deep it is,
+    and a row deleted between requests cannot invalidate the cursor.
+
+    Args:
+        limit (Optional[int]): The requested page size.
+        cursor (Optional[str]): The cursor returned with the previous page, if any.
+        where (Optional[Dict[str, Any]]): Additional filters for the listing.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for `find_many`.
+    """
+    after = decode_cursor(cursor)
+    where = dict(where or {})
+    if after is not None:
+        where["id"] = {"gt": after}
+    return {"where": where, "take": clamp_limit(limit) + 1, "order": {"id": "asc"}}
+
+
+def split_page(
+    rows: Sequence[T], limit: Optional[int]
+) -> Tuple[List[T], Optional[str]]:
+    """
+    Trims the look-ahead row fetched by `page_query` and derives the cursor of the next page.
+
+    Args:
+        rows (Sequence[T]): The rows returned by `find_many` or a raw query, each with an `id` attribute or key.
+        limit (Optional[int]): The requested page size.
+
+    Returns:
+        Tuple[List[T], Optional[str]]: The rows of this page and the next cursor, or None on the last page.
+    """
+    size = clamp_limit(limit)
+    page = list(rows[:size])
+    if len(rows) > size:
+        last = page[-1]
+        return page, encode_cursor(last["id"] if isinstance(last, dict) else last.id)
+    return page, None
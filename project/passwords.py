@@ -0,0 +1,151 @@
+import asyncio
+import concurrent.futures
+import logging
+import time
+from typing import Dict, Iterable
+
+import bcrypt
+import project.config
+
+logger = logging.getLogger(__name__)
+
+_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=project.config.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+
+def _hash(password: str) -> str:
+    rounds = project.config.BCRYPT_ROUNDS or project.config.BCRYPT_MIN_ROUNDS
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def _verify(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+    except ValueError:
+        # Not a bcrypt hash, e.g. a password stored before hashing was enforced.
+        return False
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hashes a password with bcrypt on the password worker pool, so the event loop keeps serving other requests.
+
+    Args:
+        password (str): The plaintext password.
+
+    Returns:
+        str: The hashed password.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_executor, _hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    """
+    Checks a password against a stored bcrypt hash on the password worker pool.
+
+    Args:
+        password (str): The plaintext password to check.
+        hashed (str): The stored hash.
+
+    Returns:
+        bool: Whether the password matches.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor, _verify, password, hashed
+    )
+
+
+def needs_rehash(hashed: str) -> bool:
+    """
+    Tells whether a stored hash was made with a lower cost factor than the configured one.
+
+    Hashes are only ever upgraded: worker processes calibrate independently and may settle on neighbouring costs, and
+    rewriting in both directions would flip a hash back and forth depending on which worker serves the login.
+    """
+    try:
+        cost = int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return cost < (project.config.BCRYPT_ROUNDS or project.config.BCRYPT_MIN_ROUNDS)
+
+
+def time_hash(rounds: int) -> float:
+    """
+    Measures how long one bcrypt hash takes at the given cost factor on this machine, in seconds.
+    """
+    salt = bcrypt.gensalt(rounds)
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration password", salt)
+    return time.perf_counter() - started
+
+
+def calibrate(
+    target: float = project.config.BCRYPT_TARGET_SECONDS,
+    min_rounds: int = project.config.BCRYPT_MIN_ROUNDS,
+    max_rounds: int = project.config.BCRYPT_MAX_ROUNDS,
+) -> int:
+    """
+    Picks the highest bcrypt cost factor whose hash time on this machine stays within `target`.
+
+    Each extra round doubles the hash time, so costs are measured upwards from `min_rounds` until the next one would
+    exceed the target. `min_rounds` is returned even on hardware too slow to meet the target.
+
+    Args:
+        target (float): The wanted hash time, in seconds.
+        min_rounds (int): The lowest acceptable cost factor.
+        max_rounds (int): The highest cost factor to consider.
+
+    Returns:
+        int: The chosen cost factor.
+    """
+    rounds = min_rounds
+    elapsed = time_hash(rounds)
+    while rounds < max_rounds and elapsed * 2 <= target:
+        rounds += 1
+        elapsed = time_hash(rounds)
+    return rounds
+
+
+def benchmark(costs: Iterable[int]) -> Dict[int, float]:
+    """
+    Reports the hash time in seconds for each of `costs` on this machine.
+    """
+    return {rounds: time_hash(rounds) for rounds in costs}
+
+
+async def configure() -> int:
+    """
+    Calibrates the bcrypt cost factor on the worker pool unless BCRYPT_ROUNDS is set, and stores it in the config.
+
+    Returns:
+        int: The cost factor new hashes are made with.
+    """
+    if project.config.BCRYPT_ROUNDS is None:
+        project.config.BCRYPT_ROUNDS = await asyncio.get_running_loop().run_in_executor(
+            _executor, calibrate
+        )
+        logger.info(
+            "Calibrated bcrypt cost factor to %d for a %.3fs target",
+            project.config.BCRYPT_ROUNDS,
+            project.config.BCRYPT_TARGET_SECONDS,
+        )
+    return project.config.BCRYPT_ROUNDS
+
+
+def shutdown() -> None:
+    """
+    Stops the password worker pool, waiting for hashes in progress.
+    """
+    _executor.shutdown(wait=True, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    for rounds, elapsed in benchmark(
+        range(project.config.BCRYPT_MIN_ROUNDS, project.config.BCRYPT_MAX_ROUNDS + 1)
+    ).items():
+        print(f"cost {rounds:2d}: {elapsed * 1000:9.1f} ms")
+    print(
+        f"calibrated cost for {project.config.BCRYPT_TARGET_SECONDS:.3f}s: {calibrate()}"
+    )
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+import project.config
+import project.homeassistant_client
+import project.homeassistant_mirror
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class ReconcileEntitiesResponse(BaseModel):
+    """
+    Report of one reconciliation run between the Home Assistant entity registry and the Entity table.
+    """
+
+    success: bool
+    message: str
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    duration_ms: float = 0.0
+
+
+_lock = asyncio.Lock()
+
+_last_registry: Optional[Dict[str, str]] = None
+
+last_report: Optional[ReconcileEntitiesResponse] = None
+
+
+async def fetchRegistry(
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror] = None,
+) -> Dict[str, str]:
+    """
+    Pulls the Home Assistant entity list and maps every entity id to the entity type it should be stored with.
+
+    The type is the entity's device class when it has one, and its domain otherwise. The websocket mirror is used when
+    it is ready, so a reconciliation costs no upstream request.
+
+    Args:
+        client (HomeAssistantClient): The application-wide Home Assistant client owned by the server lifespan.
+        mirror (Optional[HomeAssistantMirror]): The websocket state mirror, if enabled.
+
+    Returns:
+        Dict[str, str]: Entity types keyed by Home Assistant entity id.
+    """
+    if mirror is not None and mirror.ready:
+        states = mirror.states()
+    else:
+        states = (await client.get("/api/states")).json()
+    return {
+        state["entity_id"]: state.get("attributes", {}).get("device_class")
+        or state["entity_id"].split(".", 1)[0]
+        for state in states
+    }
+
+
+async def reconcileEntities(
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror] = None,
+    force: bool = False,
+) -> ReconcileEntitiesResponse:
+    """
+    Brings the Entity table in line with the Home Assistant entity registry.
+
+    Reconciled rows carry their Home Assistant entity id in `haEntityId` and are diffed on it; rows created by hand
+    have none and are never touched. The registry is diffed against those rows into new, changed and removed entities, and the diff is applied
+    with one `create_many`, one `update_many` per target type and one `delete_many` inside a single transaction. Runs
+    are incremental: when the registry is identical to the one seen by the previous run, the database is not queried.
+
+    Args:
+        client (HomeAssistantClient): The application-wide Home Assistant client owned by the server lifespan.
+        mirror (Optional[HomeAssistantMirror]): The websocket state mirror, if enabled.
+        force (bool): Diff against the database even if the registry has not changed since the previous run.
+
+    Returns:
+        ReconcileEntitiesResponse: Row counts and timing of the run.
+    """
+    global _last_registry, last_report
+    async with _lock:
+        started = time.perf_counter()
+        registry = await fetchRegistry(client, mirror)
+        if not force and registry == _last_registry:
+            last_report = ReconcileEntitiesResponse(
+                success=True,
+                message="Registry unchanged since the last run.",
+                unchanged=len(registry),
+                duration_ms=(time.perf_counter() - started) * 1000,
+            )
+            return last_report
+        rows = await prisma.models.Entity.prisma().find_many(
+            where={"haEntityId": {"not": None}}
+        )
+        existing = {row.haEntityId: row for row in rows}
+        to_create = [entity_id for entity_id in registry if entity_id not in existing]
+        to_update: Dict[str, List[int]] = defaultdict(list)
+        unchanged = 0
+        for entity_id, row in existing.items():
+            entity_type = registry.get(entity_id)
+            if entity_type is None:
+                continue
+            if row.entityType != entity_type:
+                to_update[entity_type].append(row.id)
+            else:
+                unchanged += 1
+        to_delete = [
+            row.id for entity_id, row in existing.items() if entity_id not in registry
+        ]
+        room_id = project.config.ENTITY_RECONCILE_ROOM_ID
+        skipped = 0
+        if room_id is None:
+            skipped = len(to_create)
+            to_create = []
+        created = updated = deleted = 0
+        if to_create or to_update or to_delete:
+            async with prisma.get_client().tx() as tx:
+                if to_create:
+                    created = await prisma.models.Entity.prisma(tx).create_many(
+                        data=[
+                            {
+                                "name": entity_id,
+                                "entityType": registry[entity_id],
+                                "roomId": room_id,
+                                "haEntityId": entity_id,
+                            }
+                            for entity_id in to_create
+                        ],
+                        skip_duplicates=True,
+                    )
+                    skipped += len(to_create) - created
+                for entity_type, ids in to_update.items():
+                    updated += await prisma.models.Entity.prisma(tx).update_many(
+                        where={"id": {"in": ids}}, data={"entityType": entity_type}
+                    )
+                if to_delete:
+                    deleted = await prisma.models.Entity.prisma(tx).delete_many(
+                        where={"id": {"in": to_delete}}
+                    )
+        _last_registry = registry
+        last_report = ReconcileEntitiesResponse(
+            success=True,
+            message="Entities reconciled with Home Assistant.",
+            created=created,
+            updated=updated,
+            deleted=deleted,
+            unchanged=unchanged,
+            skipped=skipped,
+            duration_ms=(time.perf_counter() - started) * 1000,
+        )
+        logger.info("Entity reconciliation finished: %s", last_report)
+        return last_report
+
+
+async def reconcileEntitiesAsAdmin(
+    admin_userId: int,
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror] = None,
+) -> ReconcileEntitiesResponse:
+    """
+    Runs a full reconciliation on demand. Only administrators may trigger it.
+
+    Args:
+        admin_userId (int): The user ID of the administrator triggering the run, used to verify admin privileges.
+        client (HomeAssistantClient): The application-wide Home Assistant client owned by the server lifespan.
+        mirror (Optional[HomeAssistantMirror]): The websocket state mirror, if enabled.
+
+    Returns:
+        ReconcileEntitiesResponse: Row counts and timing of the run, or the reason it was refused.
+    """
+    admin = await prisma.models.User.prisma().find_unique(where={"id": admin_userId})
+    if not admin or admin.role != prisma.enums.Role.ADMIN:
+        return ReconcileEntitiesResponse(
+            success=False, message="Unauthorized: Only admins can reconcile entities."
+        )
+    return await reconcileEntities(client, mirror, force=True)
+
+
+async def runPeriodically(
+    client: project.homeassistant_client.HomeAssistantClient,
+    mirror: Optional[project.homeassistant_mirror.HomeAssistantMirror] = None,
+    interval: float = project.config.ENTITY_RECONCILE_INTERVAL,
+) -> None:
+    """
+    Reconciles entities every `interval` seconds until cancelled. Failures are logged and retried on the next tick.
+    """
+    while True:
+        try:
+            await reconcileEntities(client, mirror)
+        except Exception:
+            logger.exception("Scheduled entity reconciliation failed")
+        await asyncio.sleep(interval)
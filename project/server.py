@@ -1,9 +1,12 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import project.addEntity_service
 import project.addService_service
+import project.auth
+import project.config
 import project.createEntity_service
 import project.createRoom_service
 import project.createUser_service
@@ -11,34 +14,87 @@ import project.deleteEntity_service
 import project.deleteRoom_service
 import project.deleteService_service
 import project.deleteUser_service
+import project.expireSessions_service
+import project.getEntitiesBatch_service
 import project.getRoomDetails_service
+import project.getRoomsBatch_service
 import project.getTests_service
 import project.getUser_service
+import project.homeassistant_client
+import project.homeassistant_mirror
 import project.listEntities_service
 import project.listEntitiesByRoom_service
 import project.listRooms_service
 import project.listServices_service
 import project.login_service
 import project.logout_service
+import project.passwords
+import project.reconcileEntities_service
+import project.singleflight
+import project.tokens
 import project.updateEntity_service
 import project.updateRoom_service
 import project.updateService_service
 import project.updateUser_service
-from fastapi import FastAPI
+from fastapi import FastAPI, Query
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from prisma import Prisma
+from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
 db_client = Prisma(auto_register=True)
 
+ha_client = project.homeassistant_client.HomeAssistantClient()
+
+ha_mirror = project.homeassistant_mirror.HomeAssistantMirror()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    project.tokens.check_secret()
     await db_client.connect()
+    await ha_client.connect()
+    await project.passwords.configure()
+    await project.tokens.load_revocations()
+    if project.config.HOMEASSISTANT_MIRROR_ENABLED:
+        await ha_mirror.start()
+    reconcile_task = None
+    if project.config.ENTITY_RECONCILE_INTERVAL > 0:
+        reconcile_task = asyncio.create_task(
+            project.reconcileEntities_service.runPeriodically(ha_client, ha_mirror)
+        )
+    sweep_task = None
+    if project.config.SESSION_SWEEP_INTERVAL > 0:
+        sweep_task = asyncio.create_task(
+            project.expireSessions_service.runPeriodically()
+        )
+    revocation_task = None
+    if project.config.SESSION_TOKEN_FORMAT == project.tokens.SIGNED:
+        revocation_task = asyncio.create_task(project.tokens.runPeriodically())
     yield
+    if revocation_task is not None:
+        revocation_task.cancel()
+    if sweep_task is not None:
+        sweep_task.cancel()
+    if reconcile_task is not None:
+        reconcile_task.cancel()
+    await ha_mirror.stop()
+    await ha_client.disconnect()
     await db_client.disconnect()
+    project.passwords.shutdown()
+
+
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
+def _sparse(res: BaseModel) -> Response:
+    # A trimmed model would fail validation against the route's full response_model.
+    return Response(content=res.model_dump_json(), media_type="application/json")
 
 
 app = FastAPI(
@@ -147,12 +203,78 @@ async def api_post_addService(
 @app.get("/rooms", response_model=project.listRooms_service.GetRoomsResponse)
 async def api_get_listRooms(
     request: project.listRooms_service.GetRoomsRequest,
+    authorization: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    all: bool = False,
 ) -> project.listRooms_service.GetRoomsResponse | Response:
     """
-    Retrieves a list of all rooms. Each room includes details such as name and associated entities. This endpoint will utilize the HomeAssistant-API to gather room data and is protected to ensure only authenticated users access it.
+    Retrieves a list of the caller's rooms; admins may pass `all=true` to list the rooms of every user. Each room includes details such as name and associated entities. This endpoint will utilize the HomeAssistant-API to gather room data and is protected to ensure only authenticated users access it. Results are paginated by id: pass the returned `next_cursor` as `cursor` to fetch the next page. Pass `fields`, e.g. `id,name`, to receive only those room fields.
+    """
+    try:
+        owner = await project.listRooms_service.roomOwner(authorization, all)
+        if project.config.ROOM_LISTING_MODE == "sql" and not fields:
+            body = await project.listRooms_service.listRoomsJson(limit, cursor, owner)
+            return Response(content=body, media_type="application/json")
+        res = await project.listRooms_service.listRooms(
+            request, limit, cursor, fields, owner
+        )
+        if fields:
+            return _sparse(res)
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/rooms/batch", response_model=project.getRoomsBatch_service.GetRoomsBatchResponse
+)
+async def api_get_getRoomsBatch(
+    authorization: str,
+    ids: List[int] = Query(...),
+    all: bool = False,
+) -> project.getRoomsBatch_service.GetRoomsBatchResponse | Response:
+    """
+    Resolves several of the caller's rooms and their entities in one request, e.g. `?ids=3&ids=1`; admins may pass `all=true` to resolve rooms of every user. Rooms are returned in the order of `ids`, and ids that match no accessible room are listed in `missing_ids`.
+    """
+    try:
+        owner = await project.listRooms_service.roomOwner(authorization, all)
+        res = await project.getRoomsBatch_service.getRoomsBatch(ids, owner)
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/entities/batch",
+    response_model=project.getEntitiesBatch_service.GetEntitiesBatchResponse,
+)
+async def api_get_getEntitiesBatch(
+    authorization: str,
+    ids: List[int] = Query(...),
+    all: bool = False,
+) -> project.getEntitiesBatch_service.GetEntitiesBatchResponse | Response:
+    """
+    Resolves several entities in the caller's rooms in one request, e.g. `?ids=3&ids=1`; admins may pass `all=true` to resolve entities of every user. Entities are returned in the order of `ids`, and ids that match no accessible entity are listed in `missing_ids`.
     """
     try:
-        res = await project.listRooms_service.listRooms(request)
+        owner = await project.listRooms_service.roomOwner(authorization, all)
+        res = await project.getEntitiesBatch_service.getEntitiesBatch(ids, owner)
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -239,7 +361,59 @@ async def api_get_listEntities(
     Retrieves a list of all entities managed by Home Assistant. Each entity includes details such as name, type, and status. The 'pip install HomeAssistant-API' is used internally to fetch this data. Authentication is required to ensure only authorized users can access this information.
     """
     try:
-        res = await project.listEntities_service.listEntities(authorization)
+        res = await project.listEntities_service.listEntities(
+            authorization, ha_client, ha_mirror
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get("/entities/stream", response_model=None)
+async def api_get_streamEntities(
+    authorization: str,
+) -> StreamingResponse | Response:
+    """
+    Streams the list of all entities managed by Home Assistant as a chunked response with the same shape as GET /entities. Entities are parsed from the upstream body incrementally and written out as they arrive, keeping memory flat for very large installations.
+    """
+    try:
+        body = project.listEntities_service.streamEntitiesJson(
+            authorization, ha_client, ha_mirror
+        )
+        first = await anext(body)
+        return StreamingResponse(_prepend(first, body), media_type="application/json")
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/admin/reconcile/entities",
+    response_model=project.reconcileEntities_service.ReconcileEntitiesResponse,
+)
+async def api_post_reconcileEntities(
+    admin_userId: int,
+) -> project.reconcileEntities_service.ReconcileEntitiesResponse | Response:
+    """
+    Reconciles the stored entities with the Home Assistant entity registry on demand, creating, updating and removing rows in bulk inside one transaction. Restricted to administrators; the report includes row counts and timing.
+    """
+    try:
+        res = await project.reconcileEntities_service.reconcileEntitiesAsAdmin(
+            admin_userId, ha_client, ha_mirror
+        )
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -345,14 +519,17 @@ async def api_put_updateEntity(
 
 @app.post("/rooms", response_model=project.createRoom_service.CreateRoomResponse)
 async def api_post_createRoom(
-    room_name: str, entities: List[int], user_role: project.createRoom_service.Role
+    room_name: str,
+    entities: List[int],
+    user_role: project.createRoom_service.Role,
+    userId: int,
 ) -> project.createRoom_service.CreateRoomResponse | Response:
     """
-    Allows the creation of a new room by specifying details such as room name and entities. This endpoint modifies the room layout and requires an admin level access.
+    Allows the creation of a new room by specifying details such as room name and entities. This endpoint modifies the room layout and requires an admin level access. The room is owned by the user `userId`.
     """
     try:
         res = await project.createRoom_service.createRoom(
-            room_name, entities, user_role
+            room_name, entities, user_role, userId
         )
         return res
     except Exception as e:
@@ -389,6 +566,30 @@ async def api_post_createEntity(
         )
 
 
+@app.post(
+    "/entities/bulk",
+    response_model=project.createEntity_service.CreateEntitiesResponse,
+)
+async def api_post_createEntities(
+    roomId: int, entities: List[project.createEntity_service.NewEntity]
+) -> project.createEntity_service.CreateEntitiesResponse | Response:
+    """
+    Creates many entities in one room with a single database statement. Entities whose name already exists in the room are skipped and counted in the response.
+    """
+    try:
+        res = await project.createEntity_service.createEntities(roomId, entities)
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
 @app.post("/entities", response_model=project.addEntity_service.AddEntityResponse)
 async def api_post_addEntity(
     name: str, entityType: str, config: Dict[str, Any], role: str
@@ -413,12 +614,14 @@ async def api_post_addEntity(
 @app.get("/services", response_model=project.listServices_service.GetServicesResponse)
 async def api_get_listServices(
     request: project.listServices_service.GetServicesRequest,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
 ) -> project.listServices_service.GetServicesResponse | Response:
     """
-    Retrieves a list of all services available in the Home Assistant environment. It returns details like service name, domain, and description. This route queries the HomeAssistant API to fetch the services and responds with a JSON listing each service.
+    Retrieves a list of all services available in the Home Assistant environment. It returns details like service name, domain, and description. This route queries the HomeAssistant API to fetch the services and responds with a JSON listing each service. Results are paginated by id: pass the returned `next_cursor` as `cursor` to fetch the next page.
     """
     try:
-        res = await project.listServices_service.listServices(request)
+        res = await project.listServices_service.listServices(request, limit, cursor)
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -437,12 +640,19 @@ async def api_get_listServices(
 )
 async def api_get_listEntitiesByRoom(
     roomId: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
 ) -> project.listEntitiesByRoom_service.GetRoomEntitiesResponse | Response:
     """
-    Lists all entities assigned to a specified room. Useful for both users and admins to overview the equipment or devices in a room. This list is pulled using HomeAssistant-API.
+    Lists all entities assigned to a specified room. Useful for both users and admins to overview the equipment or devices in a room. This list is pulled using HomeAssistant-API. Results are paginated by id: pass the returned `next_cursor` as `cursor` to fetch the next page. Pass `fields`, e.g. `id,name`, to receive only those entity fields.
     """
     try:
-        res = await project.listEntitiesByRoom_service.listEntitiesByRoom(roomId)
+        res = await project.listEntitiesByRoom_service.listEntitiesByRoom(
+            roomId, limit, cursor, fields
+        )
+        if fields:
+            return _sparse(res)
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -466,7 +676,9 @@ async def api_put_updateUser(
     Updates a user's details such as roles and password, identified by user ID. Enhanced security measures are enforced to protect sensitive data.
     """
     try:
-        res = await project.updateUser_service.updateUser(password, userId, role)
+        res = await project.updateUser_service.updateUser(
+            userId=userId, role=role, password=password
+        )
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -484,12 +696,17 @@ async def api_put_updateUser(
 )
 async def api_get_getRoomDetails(
     roomId: str,
+    fields: Optional[str] = None,
 ) -> project.getRoomDetails_service.RoomDetailsResponse | Response:
     """
-    Fetches detailed information about a specific room, including the entities within the room. This information is fetched using the HomeAssistant-API. Access is restricted to authenticated users.
+    Fetches detailed information about a specific room, including the entities within the room. This information is fetched using the HomeAssistant-API. Access is restricted to authenticated users. Pass `fields`, e.g. `roomName`, to receive only those fields.
     """
     try:
-        res = await project.getRoomDetails_service.getRoomDetails(roomId)
+        res = await project.getRoomDetails_service.getRoomDetails(
+            roomId, ha_client, ha_mirror, fields
+        )
+        if fields:
+            return _sparse(res)
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -505,12 +722,16 @@ async def api_get_getRoomDetails(
 @app.get("/users/{userId}", response_model=project.getUser_service.UserDetailsResponse)
 async def api_get_getUser(
     userId: int,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
 ) -> project.getUser_service.UserDetailsResponse | Response:
     """
-    Fetches a specific user's information by user ID. It ensures confidentiality by limiting data exposure to authorized roles.
+    Fetches a specific user's information by user ID. It ensures confidentiality by limiting data exposure to authorized roles. Sessions and rooms are only included when requested with `expand`, e.g. `sessions,rooms.entities`. Pass `fields`, e.g. `id,email`, to receive only those fields.
     """
     try:
-        res = await project.getUser_service.getUser(userId)
+        res = await project.getUser_service.getUser(userId, fields, expand)
+        if fields:
+            return _sparse(res)
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -545,3 +766,30 @@ async def api_put_updateRoom(
             status_code=500,
             media_type="application/json",
         )
+
+
+@app.get("/metrics", response_model=None)
+async def api_get_metrics() -> Dict[str, Any] | Response:
+    """
+    Reports runtime statistics for the shared upstream clients and caches, such as the Home Assistant connection pool and the entity listing cache.
+    """
+    try:
+        return {
+            "homeassistant_pool": ha_client.stats(),
+            "homeassistant_mirror": ha_mirror.stats(),
+            "entities_cache": project.listEntities_service.entities_cache.stats(),
+            "singleflight": project.singleflight.group.stats(),
+            "session_cache": project.auth.session_cache.stats(),
+            "session_revocations": project.tokens.revoked_sessions.stats(),
+            "session_sweep": project.expireSessions_service.counters,
+            "entity_reconcile": project.reconcileEntities_service.last_report,
+        }
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
@@ -0,0 +1,79 @@
+import asyncio
+import functools
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one in-flight awaitable whose result, or exception, is shared by every caller.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.coalesced: Dict[str, int] = defaultdict(int)
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[T]], name: str = "default"
+    ) -> T:
+        """
+        Runs `fn` unless a call with the same key is already in flight, in which case its result is awaited instead.
+
+        Args:
+            key (Hashable): Identifies calls that are interchangeable.
+            fn (Callable[[], Awaitable[T]]): Coroutine factory performing the actual work.
+            name (str): Label under which the call is counted in the metrics.
+
+        Returns:
+            T: The result of the single underlying call.
+        """
+        self.calls[name] += 1
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced[name] += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "calls": dict(self.calls),
+            "coalesced": dict(self.coalesced),
+        }
+
+
+group = SingleFlight()
+
+
+def _make_key(name: str, args: tuple, kwargs: dict) -> Hashable:
+    key = (name, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return (name, repr(args), repr(sorted(kwargs.items())))
+    return key
+
+
+def coalesce(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Decorates a read service so that concurrent calls with the same arguments share a single execution.
+    """
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await group.do(
+            _make_key(name, args, kwargs), lambda: fn(*args, **kwargs), name=name
+        )
+
+    return wrapper
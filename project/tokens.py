@@ -0,0 +1,207 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import prisma
+import prisma.models
+import project.bloom
+import project.config
+
+logger = logging.getLogger(__name__)
+
+SIGNED = "signed"
+
+# Placeholder values that must never be used to sign tokens.
+_PLACEHOLDER_SECRETS = ("", "change-me")
+
+_secret = (project.config.SESSION_TOKEN_SECRET or "").strip().encode()
+
+# Ids of sessions invalidated by logout. A hit may be a false positive, so it is only a cue to check the database.
+revoked_sessions = project.bloom.BloomFilter(
+    capacity=project.config.SESSION_REVOCATION_CAPACITY
+)
+
+# Revocations made while `load_revocations` is reading the database, replayed into the rebuilt filter.
+_pending: Optional[List[int]] = None
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def check_secret() -> None:
+    """
+    Refuses to run in signed mode without a real signing secret, since anyone could forge tokens signed with an empty
+    or published key.
+
+    Raises:
+        RuntimeError: If SESSION_TOKEN_FORMAT is "signed" and SESSION_TOKEN_SECRET is unset or a placeholder.
+    """
+    if (
+        project.config.SESSION_TOKEN_FORMAT == SIGNED
+        and _secret.decode() in _PLACEHOLDER_SECRETS
+    ):
+        raise RuntimeError(
+            'SESSION_TOKEN_SECRET must be set to a random value when SESSION_TOKEN_FORMAT is "signed"'
+        )
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_secret, payload.encode(), hashlib.sha256).digest())
+
+
+def is_signed(token: str) -> bool:
+    """
+    Tells a signed token from a plain session id.
+    """
+    return "." in token
+
+
+def issue(session_id: int, user_id: int, role: str) -> str:
+    """
+    Issues a signed session token embedding the session, its user and role, and an expiry.
+
+    Args:
+        session_id (int): The session the token stands for.
+        user_id (int): The session's user.
+        role (str): The user's role when the token is issued.
+
+    Returns:
+        str: The token, as `<payload>.<signature>` in URL-safe base64.
+    """
+    claims = {
+        "sid": session_id,
+        "uid": user_id,
+        "role": role,
+        "exp": int(time.time() + project.config.SESSION_TOKEN_TTL),
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify(token: str, check_expiry: bool = True) -> Dict[str, Any]:
+    """
+    Checks a signed token's signature and expiry without touching the database.
+
+    Args:
+        token (str): A token produced by `issue`.
+        check_expiry (bool): Whether an expired token is rejected.
+
+    Returns:
+        Dict[str, Any]: The embedded claims: `sid`, `uid`, `role` and `exp`.
+
+    Raises:
+        ValueError: If the token is malformed, forged or expired.
+    """
+    if _secret.decode() in _PLACEHOLDER_SECRETS:
+        raise ValueError("Invalid or expired session token")
+    payload, _, signature = token.partition(".")
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError("Invalid or expired session token")
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise ValueError("Invalid or expired session token")
+    if check_expiry and claims["exp"] <= time.time():
+        raise ValueError("Invalid or expired session token")
+    return claims
+
+
+def accepts_unsigned() -> bool:
+    """
+    Tells whether plain session ids are accepted as tokens. They are not once signed tokens are issued, since
+    sequential ids would otherwise remain valid bearer credentials.
+    """
+    return project.config.SESSION_TOKEN_FORMAT != SIGNED
+
+
+def session_id_of(token: str) -> Optional[int]:
+    """
+    Extracts the session id from a token in an accepted format, ignoring expiry. Returns None for an unreadable token.
+    """
+    try:
+        if accepts_unsigned():
+            return int(token)
+        if is_signed(token):
+            return verify(token, check_expiry=False)["sid"]
+        return None
+    except (ValueError, KeyError):
+        return None
+
+
+def revoke(session_id: int) -> None:
+    revoked_sessions.add(session_id)
+    if _pending is not None:
+        _pending.append(session_id)
+
+
+async def revoke_user(user_id: int) -> None:
+    """
+    Invalidates every session of a user, e.g. after a role change, so no signed token keeps carrying the old role.
+    """
+    sessions = await prisma.models.Session.prisma().find_many(
+        where={"userId": user_id, "valid": True}
+    )
+    for session in sessions:
+        revoke(session.id)
+    if sessions:
+        await prisma.models.Session.prisma().update_many(
+            where={"id": {"in": [session.id for session in sessions]}},
+            data={"valid": False},
+        )
+
+
+async def load_revocations() -> int:
+    """
+    Rebuilds the revocation filter from the sessions marked invalid in the database.
+
+    Only sessions created within SESSION_TOKEN_TTL are loaded, since tokens of older sessions have expired anyway. The
+    new filter replaces the old one once complete, so the filter only holds ids that can still matter and its false
+    positive rate stays near the configured one.
+
+    Returns:
+        int: The number of revoked sessions loaded.
+    """
+    global revoked_sessions, _pending
+    _pending = []
+    try:
+        rows = await prisma.get_client().query_raw(
+            'SELECT "id" FROM "Session" WHERE "valid" = false '
+            "AND \"createdAt\" > (NOW() AT TIME ZONE 'UTC') - make_interval(secs => $1)",
+            project.config.SESSION_TOKEN_TTL,
+        )
+        rebuilt = project.bloom.BloomFilter(
+            capacity=project.config.SESSION_REVOCATION_CAPACITY
+        )
+        for row in rows:
+            rebuilt.add(row["id"])
+        for session_id in _pending:
+            rebuilt.add(session_id)
+        revoked_sessions = rebuilt
+    finally:
+        _pending = None
+    return len(rows)
+
+
+async def runPeriodically(
+    interval: float = project.config.SESSION_REVOCATION_REBUILD_INTERVAL,
+) -> None:
+    """
+    Rebuilds the revocation filter every `interval` seconds until cancelled. Failures are logged and retried on the next
+    tick.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await load_revocations()
+        except Exception:
+            logger.exception("Rebuilding the session revocation filter failed")
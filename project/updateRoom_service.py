@@ -38,6 +38,8 @@ async def updateRoom(
 ) -> UpdateRoomDetailsResponse:
     """
     Updates details of an existing room, such as the name or entities list. Only accessible by admins to ensure security over modifications.
+    The rename, the assignment of the listed entities and the removal of the room's other entities run in one transaction,
+    and the final state is taken from the update itself rather than read back afterwards.
 
     Args:
         roomId (int): The unique identifier of the room to be updated.
@@ -47,29 +49,37 @@ async def updateRoom(
     Returns:
         UpdateRoomDetailsResponse: Response model returning the updated details of the room, reflecting any changes made.
     """
-    room = await prisma.models.Room.prisma().find_unique(
-        where={"id": roomId}, include={"entities": True}
-    )
-    if room is None:
-        raise ValueError("Room not found")
     update_data = {"name": name} if name is not None else {}
-    current_entity_ids = {entity.id for entity in room.entities}
-    await prisma.models.Entity.prisma().delete_many(
-        where={"id": {"in": list(current_entity_ids - set(entities))}, "roomId": roomId}
-    )
-    entities_to_add = [
-        {"id": entity_id, "roomId": roomId}
-        for entity_id in set(entities) - current_entity_ids
-    ]
-    if entities_to_add:
-        await prisma.models.Entity.prisma().create_many(
-            data=entities_to_add, skip_duplicates=True
+    wanted = set(entities)
+    async with prisma.get_client().tx() as tx:
+        # Lock the room row before anything else, so parallel updates of the same room are applied one after another.
+        # The update below does not write the row when only entities change, so it cannot be relied on for the lock.
+        locked = await tx.query_raw(
+            'SELECT "id" FROM "Room" WHERE "id" = $1 FOR UPDATE', roomId
+        )
+        if not locked:
+            raise ValueError("Room not found")
+        updated_room = await prisma.models.Room.prisma(tx).update(
+            where={"id": roomId},
+            data={
+                **update_data,
+                "entities": {"connect": [{"id": entity_id} for entity_id in wanted]},
+            },
+            include={"entities": True},
+        )
+        if updated_room is None:
+            raise ValueError("Room not found")
+        await prisma.models.Entity.prisma(tx).delete_many(
+            where={"roomId": roomId, "id": {"notIn": list(wanted)}}
+        )
+    return UpdateRoomDetailsResponse(
+        room=Room(
+            id=updated_room.id,
+            name=updated_room.name,
+            entities=[
+                Entity(id=entity.id, name=entity.name, entityType=entity.entityType)
+                for entity in updated_room.entities or []
+                if entity.id in wanted
+            ],
         )
-    if update_data:
-        await prisma.models.Room.prisma().update(where={"id": roomId}, data=update_data)
-    updated_room = await prisma.models.Room.prisma().find_unique(
-        where={"id": roomId}, include={"entities": True}
     )
-    if updated_room is None:
-        raise Exception("Failed to retrieve updated room information")
-    return UpdateRoomDetailsResponse(room=updated_room)
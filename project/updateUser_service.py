@@ -1,5 +1,8 @@
 import prisma
 import prisma.models
+import project.auth
+import project.passwords
+import project.tokens
 from pydantic import BaseModel
 
 
@@ -31,7 +34,7 @@ async def updateUser(
     Args:
         userId (str): The unique identifier for the user whose details are to be updated.
         role (Role): The new role to be assigned to the user.
-        password (str): The new password for the user. This should be encrypted before transmission or have proper security measures in place to handle plain text.
+        password (str): The new password for the user. It is hashed before storage.
 
     Returns:
         UpdateUserDetailsResponse: Response model confirming the details have been updated. Could optionally include the user object to reflect the changes.
@@ -40,8 +43,15 @@ async def updateUser(
         user = await prisma.models.User.prisma().find_unique(where={"id": int(userId)})
         if user:
             updated_user = await prisma.models.User.prisma().update(
-                where={"id": int(userId)}, data={"role": role, "password": password}
+                where={"id": int(userId)},
+                data={
+                    "role": role,
+                    "password": await project.passwords.hash_password(password),
+                },
             )
+            if updated_user.role != user.role:
+                project.auth.forget_user(user.id)
+                await project.tokens.revoke_user(user.id)
             return UpdateUserDetailsResponse(
                 success=True,
                 message="prisma.models.User updated successfully.",